@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import time
+import platform
+import tracemalloc
+import subprocess
+import numpy as np
+
+# Throughput of the env stepping, rollout, evaluation and SDP paths, as
+# steps/sec (states/sec for SDP) and peak memory, saved as JSON so runs of
+# different versions can be compared:
+#
+#     python benchmark.py --out bench.json
+#     python benchmark.py --out new.json --compare bench.json
+#
+# Each case is timed as the best of `repeat` runs, then run once more under
+# tracemalloc for its peak allocation (numpy buffers included, worker
+# processes not). Memory tracing is kept out of the timed runs.
+
+def measure(fn, repeat = 3):
+    # fn() does the work and returns the number of steps it took
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        steps = fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    seconds = min(times)
+    return {"steps": int(steps), "seconds": seconds, "steps_per_sec": steps / seconds,
+            "peak_mb": peak / 2**20}
+
+
+# single env, one Python step() call per step
+def env_step(name, n_steps):
+    from envs import factory
+    env = factory(name)()
+    action = np.zeros(env.action_space.shape, dtype=np.float32)
+    def run():
+        env.reset(seed=0)
+        for _ in range(n_steps):
+            _, _, terminated, truncated, _ = env.step(action)
+            if terminated or truncated:
+                env.reset()
+        return n_steps
+    return run
+
+
+# the same env stepped n_envs at a time by each vectorization
+def vec_step(kind, name, n_envs, n_steps):
+    from envs import factory
+    from envs.fish_vec import FishVecEnv
+    from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+    make = factory(name)
+    if kind == "batched":
+        env = FishVecEnv(make, n_envs)
+    elif kind == "subprocess":
+        env = SubprocVecEnv([make] * n_envs)
+    else:
+        env = DummyVecEnv([make] * n_envs)
+    actions = np.zeros((n_envs,) + env.action_space.shape, dtype=np.float32)
+    def run():
+        env.seed(0)
+        env.reset()
+        for _ in range(n_steps):
+            env.step(actions)
+        return n_envs * n_steps
+    return run, env
+
+
+# whole episodes of n_reps replicates under each kind of policy
+def evaluation(kind, name, n_reps, workdir):
+    from envs import factory
+    make = factory(name, {"training": False})
+    if kind == "kernel":
+        from envs.kernels import rollout, CONSTANT, compiled_model
+        env = make()
+        def run():
+            rewards, pop, steps = rollout(env, CONSTANT, 0.02, n_reps=n_reps,
+                                          model=compiled_model(env), seed=0)
+            return steps.sum()
+        return run
+
+    from utils import evaluate_policy
+    from envs.fish_vec import FishVecEnv
+    from rollouts import rl_rewards
+    if kind == "escapement":
+        from policies import constant_escapement
+        agent = constant_escapement(0.4)
+        Tmax = make().Tmax # episodes run to Tmax when not training
+        def run():
+            evaluate_policy(agent, make, n_reps, seeds=0)
+            return Tmax * n_reps
+        return run
+
+    # untrained MLP policies: only the cost of a forward pass matters here
+    from stable_baselines3 import PPO
+    agent = PPO("MlpPolicy", make(), device="cpu", seed=0)
+    if kind != "sb3":
+        from numpy_policy import export_policy, numpy_policy
+        path = os.path.join(workdir, "policy.npz")
+        export_policy(agent, path)
+        agent = numpy_policy(path, use_numba=(kind == "numba"))
+    def run():
+        env = FishVecEnv(make, n_reps)
+        env.seed_lanes(0)
+        rewards, steps = rl_rewards(agent, env)
+        return steps.sum()
+    return run
+
+
+# SDP: grid discretization and policy iteration, per grid state
+def sdp_solve(n_states):
+    from sdp.grid import grid_model
+    from sdp.solvers import policy_iteration
+    def run():
+        states, efforts, transition, reward = grid_model(n_states=n_states, cache=False)
+        policy_iteration(transition, reward, 0.99)
+        return n_states
+    return run
+
+
+def cases(quick = False, workdir = "."):
+    # (group, parameters, runner factory)
+    n = 10 if quick else 1
+    for name in ["fish", "caribou", "ecosystem"]:
+        yield "env_step", {"env": name}, lambda name=name: (env_step(name, 20_000 // n), None)
+    for n_envs in [8, 64]:
+        for kind in ["dummy", "subprocess", "batched"]:
+            yield "vec_step", {"kind": kind, "env": "fish", "n_envs": n_envs}, \
+                lambda kind=kind, n_envs=n_envs: vec_step(kind, "fish", n_envs, 2_000 // n)
+    for kind in ["escapement", "kernel", "sb3", "numpy", "numba"]:
+        yield "evaluation", {"policy": kind, "env": "fish", "n_reps": 1000 // n}, \
+            lambda kind=kind: (evaluation(kind, "fish", 1000 // n, workdir), None)
+    for n_states in [51, 101, 201] if quick else [51, 101, 201, 401, 801]:
+        yield "sdp_solve", {"n_states": n_states}, \
+            lambda n_states=n_states: (sdp_solve(n_states), None)
+
+
+def run_all(quick = False, repeat = 3, groups = None, workdir = "."):
+    results = []
+    for group, params, make in cases(quick, workdir):
+        if groups and group not in groups:
+            continue
+        run, env = make()
+        try:
+            run() # warm-up: imports, compilation, worker start
+            result = {"group": group, **params, **measure(run, repeat)}
+        finally:
+            if env is not None:
+                env.close()
+        print(json.dumps({k: round(v, 4) if isinstance(v, float) else v
+                          for k, v in result.items()}), flush=True)
+        results.append(result)
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = None
+    return {"commit": commit or None, "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def key(result):
+    return tuple((k, v) for k, v in result.items()
+                 if k not in ("steps", "seconds", "steps_per_sec", "peak_mb"))
+
+
+def compare(old, new, tolerance = 0.1):
+    """Cases of `new` whose steps/sec fell by more than tolerance from `old`
+    (both as saved by this script), with the ratio new / old"""
+    before = {key(r): r for r in old["results"]}
+    slower = []
+    for r in new["results"]:
+        if key(r) in before:
+            ratio = r["steps_per_sec"] / before[key(r)]["steps_per_sec"]
+            print(f"{ratio:6.2f}x  {dict(key(r))}")
+            if ratio < 1 - tolerance:
+                slower.append((dict(key(r)), ratio))
+    return slower
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+    parser = argparse.ArgumentParser(description="rl-minicourse throughput benchmarks")
+    parser.add_argument("--out", default="benchmark.json")
+    parser.add_argument("--quick", action="store_true", help="smaller cases")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--groups", nargs="*", help="env_step vec_step evaluation sdp_solve")
+    parser.add_argument("--compare", help="earlier JSON output to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_all(args.quick, args.repeat, args.groups, workdir)
+    report = {"meta": metadata(), "results": results}
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(json.load(f), report)
+        sys.exit(1 if slower else 0)
@@ -0,0 +1,117 @@
+import os
+import glob
+import pickle
+import random
+import shutil
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+
+# Long stable-baselines3 training runs that survive crashes and preemption.
+# Every `every` timesteps the model (policy and optimizer state), the replay
+# buffer of off-policy algorithms, VecNormalize statistics and the Python,
+# NumPy and torch random states are written to path/step_<timesteps>, and
+# train() picks up from the latest complete checkpoint when run again:
+#
+#     model = train(ARS, "runs/ars_fish", vec_env, 800_000, verbose=0)
+#
+# The envs themselves restart from a fresh episode on resume. For resumable
+# evaluation sweeps, see utils.policy_sweep(checkpoint=...).
+
+
+def rng_state():
+    import torch
+    state = {"random": random.getstate(), "numpy": np.random.get_state(),
+             "torch": torch.get_rng_state()}
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state):
+    import torch
+    random.setstate(state["random"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+def latest_checkpoint(path):
+    # checkpoint directories are only renamed into place once complete
+    checkpoints = sorted(glob.glob(os.path.join(path, "step_*[0-9]")))
+    return checkpoints[-1] if checkpoints else None
+
+
+def save_checkpoint(model, path, keep = 2):
+    target = os.path.join(path, f"step_{model.num_timesteps:012d}")
+    tmp = target + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    model.save(os.path.join(tmp, "model.zip"))
+    if getattr(model, "replay_buffer", None) is not None:
+        model.save_replay_buffer(os.path.join(tmp, "replay_buffer.pkl"))
+    if model.get_vec_normalize_env() is not None:
+        model.get_vec_normalize_env().save(os.path.join(tmp, "vecnormalize.pkl"))
+    with open(os.path.join(tmp, "rng.pkl"), "wb") as f:
+        pickle.dump(rng_state(), f)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    for old in sorted(glob.glob(os.path.join(path, "step_*[0-9]")))[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+    return target
+
+
+class checkpointer(BaseCallback):
+    """Saves a checkpoint of the model being trained every `every` timesteps"""
+    def __init__(self, path, every = 50_000, keep = 2):
+        super().__init__()
+        self.path = path
+        self.every = every
+        self.keep = keep
+        self.last = None
+
+    def _on_training_start(self):
+        self.last = self.model.num_timesteps
+
+    def _on_step(self):
+        self.maybe_save()
+        return True
+
+    def _on_rollout_end(self):
+        # some algorithms (e.g. ARS) only report whole rollouts
+        self.maybe_save()
+
+    def maybe_save(self):
+        if self.model.num_timesteps - self.last >= self.every:
+            save_checkpoint(self.model, self.path, self.keep)
+            self.last = self.model.num_timesteps
+
+
+def train(algo, path, env, total_timesteps, every = 50_000, keep = 2,
+          policy = "MlpPolicy", learn_kwargs = None, **kwargs):
+    """
+    Train algo(policy, env, **kwargs) for total_timesteps, checkpointing to
+    path every `every` timesteps, or resume from the latest checkpoint in
+    path if there is one. The final model is saved as path/model.zip.
+    """
+    from stable_baselines3.common.vec_env import VecNormalize
+    latest = latest_checkpoint(path)
+    if latest is None:
+        model = algo(policy, env, **kwargs)
+    else:
+        if isinstance(env, VecNormalize) and os.path.exists(os.path.join(latest, "vecnormalize.pkl")):
+            env = VecNormalize.load(os.path.join(latest, "vecnormalize.pkl"), env.venv)
+        model = algo.load(os.path.join(latest, "model.zip"), env=env,
+                          device=kwargs.get("device", "auto"))
+        if os.path.exists(os.path.join(latest, "replay_buffer.pkl")):
+            model.load_replay_buffer(os.path.join(latest, "replay_buffer.pkl"))
+        with open(os.path.join(latest, "rng.pkl"), "rb") as f:
+            set_rng_state(pickle.load(f))
+
+    remaining = total_timesteps - model.num_timesteps
+    if remaining > 0:
+        model.learn(remaining, callback=checkpointer(path, every, keep),
+                    reset_num_timesteps=latest is None, **(learn_kwargs or {}))
+        save_checkpoint(model, path, keep)
+    model.save(os.path.join(path, "model.zip"))
+    return model
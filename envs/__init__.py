@@ -0,0 +1,41 @@
+import importlib
+from gymnasium.envs.registration import register
+
+# Registered gymnasium IDs, e.g. gym.make("rl-minicourse/caribou-v0", config={...}).
+# Env modules are only imported when an env is made.
+entry_points = {
+    "fish": "envs.fish:fish",
+    "one_fish": "envs.one_fish:one_fish",
+    "s3a2": "envs.s3a2:s3a2",
+    "three_fish": "envs.three_fish:three_fish",
+    "caribou": "envs.caribou:caribou",
+    "apparent_competition": "envs.apparent_competition:apparent_competition",
+    "ecosystem": "envs.ecosystem:ecosystem",
+}
+
+for name, entry_point in entry_points.items():
+    register(id=f"rl-minicourse/{name}-v0", entry_point=entry_point)
+
+
+class factory:
+    """
+    Picklable constructor of a registered env with a fixed config, for
+    subprocess workers and batched envs:
+
+        make_vec_env(factory("caribou"), 12, vec_env_cls=SubprocVecEnv)
+        FishVecEnv(factory("caribou", {"training": False}), 1000)
+    """
+    def __init__(self, name, config=None):
+        self.name = name
+        self.config = config
+
+    def __call__(self, config=None, **kwargs):
+        module, cls = entry_points[self.name].split(":")
+        return getattr(importlib.import_module(module), cls)(config or self.config)
+
+
+def vector_env(name, n_envs, config=None, shared_memory=True):
+    """n_envs copies of a registered env stepped in subprocesses, with
+    observations passed back through shared memory"""
+    from gymnasium.vector import AsyncVectorEnv
+    return AsyncVectorEnv([factory(name, config)] * n_envs, shared_memory=shared_memory)
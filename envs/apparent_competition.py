@@ -0,0 +1,85 @@
+import numpy as np
+
+from envs.fish import fish
+
+# pop = caribou, moose, wolves
+# Apparent competition (envs/apparent-competition.ipynb): caribou and moose
+# share a predator, with moose and wolf culls as the two actions. As in
+# envs/fish.py, species are indexed on the last axis.
+
+def utility(pop, effort, p):
+    # Caribou has direct value
+    benefits = 1 * pop[..., 0] 
+    
+    # small cost to any harvesting
+    costs = .00001 * np.sum(effort, axis=-1) # cost to culling
+
+    # extinction penalty
+    benefits = benefits - 10 * np.any(pop <= 0.0001, axis=-1)
+    return benefits - costs
+
+def harvest(pop, effort, p):
+    q1 = .2
+    q2 = .2
+    pop[..., 1] = pop[..., 1] * (1 - effort[..., 0] * q1) # pop 1, Moose cull
+    pop[..., 2] = pop[..., 2] * (1 - effort[..., 1] * q2) # pop 2, Wolf cull
+    return pop
+
+initial_pop = [0.2, 0.5, 0.05]
+
+
+parameters = {
+"r_x": np.float32(0.13),
+"r_y": np.float32(0.2),
+"K": np.float32(1),
+"beta": np.float32(.4),
+"v0":  np.float32(0.1),
+"h_x": np.float32(0.2),
+"h_y": np.float32(0.8),
+"tau_yx": np.float32(0.3),
+"tau_xy": np.float32(0.9),
+"alpha": np.float32(.03), 
+"dH": np.float32(0.015),
+"sigma_x": np.float32(0.05),
+"sigma_y": np.float32(0.05),
+"sigma_z": np.float32(0.05)
+}
+
+# noise: standard normal shocks, shaped like pop, drawn here if not given
+def dynamics(pop, effort, harvest_fn, p, timestep=1, noise=None):
+
+    pop = harvest_fn(pop, effort, p)        
+    X, Y, Z = pop[..., 0], pop[..., 1], pop[..., 2]
+    if noise is None:
+        noise = np.random.normal(size=np.shape(pop))
+    
+    ## env fluctuations
+    K = p["K"] # - 0.2 * np.sin(2 * np.pi * timestep / 3200)
+    beta = p["beta"]#  + 0.2 * np.sin(2 * np.pi * timestep / 3200)
+
+    X = X + (p["r_x"] * X * (1 - (X + p["tau_xy"] * Y) / K)
+            -  beta * Z * (X**2) / (p["v0"]**2 + p["h_x"] * X**2 + p["h_y"] * Y**2)
+            + p["sigma_x"] * X * noise[..., 0]
+            )
+    
+    Y = Y + (p["r_y"] * Y * (1 - (Y + p["tau_yx"]* X ) / K )
+            - beta * Z * (Y**2) / (p["v0"]**2 + p["h_x"] * X**2 + p["h_y"] * Y**2)
+            + p["sigma_y"] * Y * noise[..., 1]
+            )
+
+    Z = Z + p["alpha"] * beta * Z * (
+            (Y**2 + X**2) / (p["v0"]**2 + p["h_x"] * X**2 + p["h_y"] * Y**2)
+            ) - p["dH"] * Z +  p["sigma_z"] * Z  * noise[..., 2]
+    
+    pop = np.empty(np.shape(X) + (3,))
+    pop[..., 0], pop[..., 1], pop[..., 2] = np.float32(X), np.float32(Y), np.float32(Z)
+    return np.maximum(pop, 0, out=pop)
+
+
+class apparent_competition(fish):
+    """A 3-species apparent competition model with two control actions"""
+    def __init__(self, config=None):
+        config = {"initial_pop": initial_pop, "parameters": parameters,
+                  "dynamics": dynamics, "harvest": harvest, "utility": utility,
+                  "n_actions": 2, **(config or {})}
+        super().__init__(config)
@@ -0,0 +1,82 @@
+import numpy as np
+
+from envs.fish import fish
+from envs.forcing import sinusoid, seasonal
+
+# pop = moose, caribou, wolves
+# Caribou Scenario (3_challenge.ipynb): moose and wolf culls protect caribou.
+# As in envs/fish.py, species are indexed on the last axis so the same code
+# steps a single population or a batch.
+
+def utility(pop, effort, p):
+    benefits = 0.5 * pop[..., 1] # benefit from Caribou
+    costs = .00001 * np.sum(effort, axis=-1) # cost to culling
+    benefits = benefits - 1 * np.any(pop <= 0.01, axis=-1)
+    return benefits - costs
+
+def harvest(pop, effort, p):
+    q0 = 0.5 # catchability coefficients -- erradication is impossible
+    q2 = 0.5
+    pop[..., 0] = pop[..., 0] * (1 - effort[..., 0] * q0) # pop 0, moose
+    pop[..., 2] = pop[..., 2] * (1 - effort[..., 1] * q2) # pop 2, wolves
+    return pop
+
+initial_pop = [0.5, 0.5, 0.2]
+
+
+parameters = {
+"r_x": np.float32(0.13),
+"r_y": np.float32(0.2),
+"K": np.float32(1),
+"beta": np.float32(.1),
+"v0":  np.float32(0.1),
+"D": np.float32(0.8),
+"tau_yx": np.float32(0.7),
+"tau_xy": np.float32(0.2),
+"alpha": np.float32(.4), 
+"dH": np.float32(0.03),
+"sigma_x": np.float32(0.05),
+"sigma_y": np.float32(0.05),
+"sigma_z": np.float32(0.05),
+"forcing": {"D": sinusoid(0.5, 3200), "beta": sinusoid(0.2, 3200)},
+}
+
+# noise: standard normal shocks, shaped like pop, drawn here if not given
+def dynamics(pop, effort, harvest_fn, p, timestep=1, noise=None):
+
+    pop = harvest_fn(pop, effort, p)        
+    X, Y, Z = pop[..., 0], pop[..., 1], pop[..., 2]
+    if noise is None:
+        noise = np.random.normal(size=np.shape(pop))
+    
+    K = p["K"] # - 0.2 * np.sin(2 * np.pi * timestep / 3200)
+    D = seasonal(p, "D", timestep)
+    beta = seasonal(p, "beta", timestep)
+
+    X = X + (p["r_x"] * X * (1 - (X + p["tau_xy"] * Y) / K)
+            - (1 - D) * beta * Z * (X**2) / (p["v0"]**2 + X**2)
+            + p["sigma_x"] * X * noise[..., 0]
+            )
+    
+    Y = Y + (p["r_y"] * Y * (1 - (Y + p["tau_yx"]* X ) / K )
+            - D * beta * Z * (Y**2) / (p["v0"]**2 + Y**2)
+            + p["sigma_y"] * Y * noise[..., 1]
+            )
+
+    Z = Z + p["alpha"] * beta * Z * (
+            (1-D) * (X**2) / (p["v0"]**2 + X**2)
+            + D * (Y**2) / (p["v0"]**2 + Y**2)
+            ) - p["dH"] * Z +  p["sigma_z"] * Z  * noise[..., 2]
+    
+    pop = np.empty(np.shape(X) + (3,))
+    pop[..., 0], pop[..., 1], pop[..., 2] = np.float32(X), np.float32(Y), np.float32(Z)
+    return np.maximum(pop, 0, out=pop)
+
+
+class caribou(fish):
+    """A 3-species ecosystem model with two control actions"""
+    def __init__(self, config=None):
+        config = {"initial_pop": initial_pop, "parameters": parameters,
+                  "dynamics": dynamics, "harvest": harvest, "utility": utility,
+                  "n_actions": 2, **(config or {})}
+        super().__init__(config)
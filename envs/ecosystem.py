@@ -0,0 +1,156 @@
+import numpy as np
+
+from envs.fish import fish
+from envs.forcing import sinusoid, formula
+
+# One engine for the n-species models: a scenario is a parameter set, not code.
+# For species i (state x, species on the last axis, optionally batched):
+#
+#   dx_i = r_i x_i (1 - (C x)_i / K)                   logistic growth, competition C
+#          - F_i (A x)_i                               predation losses
+#          + a_i x_i (A^T F)_i - m_i x_i                predator feeding, mortality
+#          + sigma_i x_i eps_i
+#   F_i  = x_i^2 / (v0^2 + (H x^2)_i)                   Holling type III response
+#
+# A[i, k] is the attack rate of predator k on prey i, H the handling terms of
+# each prey's functional response and a the predators' conversion efficiency.
+# Harvest takes a fraction (e q)_i of species i for efforts e, with q the
+# (n_actions, n_species) catchability matrix. Optional "forcing" schedules
+# (envs/forcing.py) add time-varying terms to parameters, and "sequential"
+# updates species one at a time as in the hand-written models.
+
+def matvec(M, x):
+    return np.matmul(M, x[..., None])[..., 0]
+
+def rates(x, p):
+    x2 = x**2
+    F = x2 / (p["v0"]**2 + matvec(p["handling"], x2))
+    growth = p["r"] * x * (1 - matvec(p["competition"], x) / p["K"])
+    predation = F * matvec(p["attack"], x)
+    feeding = p["conversion"] * x * matvec(np.swapaxes(p["attack"], -1, -2), F)
+    return growth - predation + feeding - p["mortality"] * x
+
+def harvest(pop, effort, p):
+    pop *= 1 - effort @ p["catchability"]
+    return pop
+
+def utility(pop, effort, p):
+    catch = pop * (effort @ p["catchability"])
+    benefits = catch @ p["price"] + pop @ p["value"]
+    costs = p["cost"] * np.sum(effort, axis=-1)
+    # extinction penalty
+    benefits = benefits - p["penalty"] * np.any(pop <= p["floor"], axis=-1)
+    return benefits - costs
+
+# noise: standard normal shocks, shaped like pop, drawn here if not given
+def dynamics(pop, effort, harvest_fn, p, timestep=1, noise=None):
+    pop = harvest_fn(pop, effort, p)
+    if noise is None:
+        noise = np.random.normal(size=np.shape(pop))
+    p = forced(p, timestep)
+
+    x = np.array(pop, dtype=np.float64)
+    shock = p["sigma"] * noise
+    if p.get("sequential", False):
+        for i in range(x.shape[-1]):
+            x[..., i] += rates(x, p)[..., i] + shock[..., i] * x[..., i]
+    else:
+        x += rates(x, p) + shock * x
+    x[...] = np.float32(x)
+    return np.maximum(x, 0, out=x)
+
+
+def forced(p, timestep):
+    # parameters at timestep, per lane when timestep is batched; a scalar
+    # schedule's value is added to every entry of a vector or matrix parameter
+    if not p.get("forcing"):
+        return p
+    p = dict(p)
+    for name, f in p["forcing"].items():
+        term = f(timestep)
+        extra = np.ndim(p[name]) - (f.table.ndim - 1)
+        p[name] = p[name] + np.reshape(term, np.shape(term) + (1,) * extra)
+    return p
+
+
+# wolves split their attacks between moose (1 - D) and caribou (D)
+on_moose = np.outer([1, 0, 0], [0, 0, 1])
+on_caribou = np.outer([0, 1, 0], [0, 0, 1])
+
+def wolf_attack(D, beta):
+    return np.multiply.outer(beta * (1 - D), on_moose) + np.multiply.outer(beta * D, on_caribou)
+
+def caribou_season(t):
+    # seasonal D and beta of envs/caribou.py, as a change in attack rates
+    s = np.sin(2 * np.pi * t / 3200)
+    return wolf_attack(0.8 + 0.5 * s, 0.1 + 0.2 * s) - wolf_attack(0.8, 0.1)
+
+
+scenarios = {
+    # envs/fish.py
+    "fish": {
+        "initial_pop": [0.5],
+        "parameters": {
+            "r": [0.03], "K": 1, "competition": [[1]],
+            "v0": 0.1, "handling": [[0]], "attack": [[0]],
+            "conversion": [0], "mortality": [0], "sigma": [0.05],
+            "catchability": [[0.1]], "price": [9], "value": [0],
+            "cost": .00001, "penalty": 10, "floor": 0.001,
+            "forcing": {"r": sinusoid(-0.03, 300)},
+        },
+    },
+    # envs/caribou.py: moose, caribou, wolves
+    "caribou": {
+        "initial_pop": [0.5, 0.5, 0.2],
+        "parameters": {
+            "r": [0.13, 0.2, 0], "K": 1,
+            "competition": [[1, 0.2, 0], [0.7, 1, 0], [0, 0, 0]],
+            "v0": 0.1, "handling": [[1, 0, 0], [0, 1, 0], [0, 0, 0]],
+            "attack": wolf_attack(0.8, 0.1),
+            "conversion": [0, 0, 0.4], "mortality": [0, 0, 0.03],
+            "sigma": [0.05, 0.05, 0.05],
+            "catchability": [[0.5, 0, 0], [0, 0, 0.5]],
+            "price": [0, 0, 0], "value": [0, 0.5, 0],
+            "cost": .00001, "penalty": 1, "floor": 0.01,
+            "forcing": {"attack": formula(caribou_season)}, "sequential": True,
+        },
+    },
+    # envs/apparent_competition.py: caribou, moose, wolves
+    "apparent_competition": {
+        "initial_pop": [0.2, 0.5, 0.05],
+        "parameters": {
+            "r": [0.13, 0.2, 0], "K": 1,
+            "competition": [[1, 0.9, 0], [0.3, 1, 0], [0, 0, 0]],
+            "v0": 0.1, "handling": [[0.2, 0.8, 0], [0.2, 0.8, 0], [0, 0, 0]],
+            "attack": [[0, 0, 0.4], [0, 0, 0.4], [0, 0, 0]],
+            "conversion": [0, 0, 0.03], "mortality": [0, 0, 0.015],
+            "sigma": [0.05, 0.05, 0.05],
+            "catchability": [[0, 0.2, 0], [0, 0, 0.2]],
+            "price": [0, 0, 0], "value": [1, 0, 0],
+            "cost": .00001, "penalty": 10, "floor": 0.0001,
+            "sequential": True,
+        },
+    },
+}
+
+
+def as_arrays(p):
+    return {k: np.array(v, dtype=np.float64) if isinstance(v, list) else v
+            for k, v in p.items()}
+
+
+class ecosystem(fish):
+    """
+    An n-species model given by a parameter set: config["scenario"] names
+    one of `scenarios`, or config["parameters"] (with "initial_pop") defines
+    a new one. Other config entries are as for fish.
+    """
+    def __init__(self, config=None):
+        config = dict(config or {})
+        scenario = scenarios[config.pop("scenario", "caribou")]
+        config = {**scenario, **config}
+        config["parameters"] = as_arrays(config["parameters"])
+        config.setdefault("n_actions", len(config["parameters"]["catchability"]))
+        for name, fn in [("dynamics", dynamics), ("harvest", harvest), ("utility", utility)]:
+            config.setdefault(name, fn)
+        super().__init__(config)
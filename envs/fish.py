@@ -1,20 +1,26 @@
 
+import inspect
 import numpy as np
+
+from envs.rng import generators
+from envs.forcing import sinusoid, seasonal, precompute
+
+# NB: model functions index species on the last axis (pop[..., 0]), so the
+# same code steps a single population or a batch of shape (N, n_species)
 def utility(pop, effort, p):
     q0 = p["q_0"] # catchability
 
-    benefits = effort[0] * pop[0] * q0 * p["price"]
+    benefits = effort[..., 0] * pop[..., 0] * q0 * p["price"]
     # small cost to any harvesting
-    costs = .00001 * sum(effort) # cost to culling
+    costs = .00001 * np.sum(effort, axis=-1) # cost to culling
 
     # extinction penalty
-    if np.any(pop <= 0.001):
-        benefits -= 10
+    benefits = benefits - 10 * np.any(pop <= 0.001, axis=-1)
     return benefits - costs
 
 def harvest(pop, effort, p):
     q0 = p["q_0"] # catchability / restoration coefficients
-    pop[0] = pop[0] * (1 - effort[0] * q0) # pop 0, salmon
+    pop[..., 0] = pop[..., 0] * (1 - effort[..., 0] * q0) # pop 0, salmon
     return pop
 
 initial_pop = [0.5]
@@ -26,27 +32,34 @@ parameters = {
 "sigma_x": np.float32(0.05),
 "q_0": 0.1,
 "price": 9,
+"forcing": {"r_x": sinusoid(-0.03, 300)}, # seasonal growth rate
 }
 
 # pop = elk, caribou, wolves
 # Caribou Scenario
-def dynamics(pop, effort, harvest_fn, p, timestep=1):
+# noise: standard normal shocks, shaped like pop, drawn here if not given
+def dynamics(pop, effort, harvest_fn, p, timestep=1, noise=None):
 
     pop = harvest_fn(pop, effort, p)        
-    X = pop[0]
+    X = pop[..., 0]
+    if noise is None:
+        noise = np.random.normal(size=np.shape(pop))
     
     ## env fluctuations
     K = p["K"] # - 0.2 * np.sin(2 * np.pi * timestep / 400)
-    r = p["r_x"] - 0.03 * np.sin(2 * np.pi * timestep / 300)
+    r = seasonal(p, "r_x", timestep)
     
-    X += (r * X * (1 - X / K)
-            + p["sigma_x"] * X * np.random.normal()
+    X = X + (r * X * (1 - X / K)
+            + p["sigma_x"] * X * noise[..., 0]
             )
     
     
-    pop = np.array([X], dtype=np.float32)
-    pop = np.clip(pop, [0], [np.Inf])
-    return(pop)
+    pop = np.empty(np.shape(X) + (1,))
+    pop[..., 0] = np.float32(X)
+    return np.maximum(pop, 0, out=pop)
+
+def observe(state): # perfectly observed case
+    return state
 
 
 import gymnasium as gym
@@ -59,68 +72,104 @@ class fish(gym.Env):
         self.threshold = config.get("threshold", np.float32(1e-4))
         self.init_sigma = config.get("init_sigma", np.float32(1e-3))
         self.training = config.get("training", True)
-        self.initial_pop = config.get("initial_pop", initial_pop)
+        self.initial_pop = np.array(config.get("initial_pop", initial_pop), dtype=np.float64)
         self.parameters = config.get("parameters", parameters)
         self.dynamics = config.get("dynamics", dynamics)
         self.harvest = config.get("harvest", harvest)
         self.utility = config.get("utility", utility)
-        self.observe = config.get("observe", lambda state: state) # default to perfectly observed case
+        self.observe = config.get("observe", observe)
         self.bound = 2 * self.parameters["K"]
+        precompute(self.parameters, self.Tmax)
+        # dynamics taking `noise` are fed the env's own pre-drawn shocks,
+        # others draw from the global np.random themselves
+        self.takes_noise = "noise" in inspect.signature(self.dynamics).parameters
         
+        # one observation per species, n_actions harvest efforts
+        n_species = len(self.initial_pop)
+        n_actions = config.get("n_actions", 1)
         self.action_space = gym.spaces.Box(
-            np.array([-1], dtype=np.float32),
-            np.array([1], dtype=np.float32),
+            np.full(n_actions, -1, dtype=np.float32),
+            np.full(n_actions, 1, dtype=np.float32),
             dtype = np.float32
         )
         self.observation_space = gym.spaces.Box(
-            np.array([-1], dtype=np.float32),
-            np.array([1], dtype=np.float32),
+            np.full(n_species, -1, dtype=np.float32),
+            np.full(n_species, 1, dtype=np.float32),
             dtype=np.float32,
         )        
+        # preallocated buffers for the unit conversions in step()
+        self._effort = np.zeros(self.action_space.shape, dtype=np.float32)
+        self._state = np.zeros(self.observation_space.shape, dtype=np.float32)
+        self._pop = np.zeros(self.observation_space.shape, dtype=np.float64)
         self.reset(seed=config.get("seed", None))
 
 
+    # reset(seed=i) replays replicate 0 of seed i of a FishVecEnv (envs/rng.py);
+    # the shocks of the whole episode are drawn up front
     def reset(self, *, seed=None, options=None):
+        if seed is not None or self._np_random is None:
+            self._np_random = generators(seed)[0]
         self.timestep = 0
-        self.initial_pop += np.multiply(self.initial_pop, np.float32(self.init_sigma * np.random.normal(size=1)))
-        self.state = self.state_units(self.initial_pop)
+        n_species = self.observation_space.shape[0]
+        jitter = self.np_random.standard_normal(n_species)
+        if self.takes_noise:
+            self.noise = self.np_random.standard_normal((self.Tmax + 1, n_species))
+        pop = np.multiply(self.initial_pop, 1 + np.float32(self.init_sigma * jitter))
+        self.state = self.state_units(pop)
         info = {}
         return self.observe(self.state), info
 
 
+    # Unit conversions here are done in place in preallocated buffers; the
+    # results are identical to state_units / population_units / effort_units
     def step(self, action):
-        action = np.clip(action, self.action_space.low, self.action_space.high)
-        pop = self.population_units(self.state) # current state in natural units
-        effort = self.effort_units(action)
+        effort = self._effort
+        np.copyto(effort, action, casting="unsafe")
+        np.clip(effort, self.action_space.low, self.action_space.high, out=effort)
+        effort += 1.
+        effort /= 2
+
+        # current state in natural units
+        pop = self._pop
+        np.add(self.state, 1, out=self._state)
+        self._state *= self.bound
+        self._state /= 2
+        np.maximum(self._state, 0, out=pop)
 
         # harvest and recruitment
         reward = self.utility(pop, effort, self.parameters)
-        nextpop = self.dynamics(pop, effort, self.harvest, self.parameters, self.timestep)
+        if self.takes_noise:
+            i = self.timestep % len(self.noise)
+            if i == 0 and self.timestep > 0: # stepped past Tmax
+                self.np_random.standard_normal(out=self.noise)
+            nextpop = self.dynamics(pop, effort, self.harvest, self.parameters,
+                                    self.timestep, noise=self.noise[i])
+        else:
+            nextpop = self.dynamics(pop, effort, self.harvest, self.parameters, self.timestep)
         
         self.timestep += 1
         terminated = bool(self.timestep > self.Tmax)
         
         # in training mode only: punish for population collapse
-        if any(pop <= self.threshold) and self.training:
+        if self.training and (pop <= self.threshold).any():
             terminated = True
             reward -= 50/self.timestep
         
-        self.state = self.state_units(nextpop) # transform into [-1, 1] space
+        # transform into [-1, 1] space
+        nextpop = nextpop * 2
+        nextpop /= self.bound
+        nextpop -= 1
+        self.state = np.clip(nextpop, -1, 1, out=nextpop).astype(np.float32)
         observation = self.observe(self.state) # same as self.state
         return observation, reward, terminated, False, {}
     
     def state_units(self, pop):
-        self.state = 2 * pop / self.bound - 1
-        self.state = np.clip(self.state,  
-                             np.repeat(-1, self.state.__len__()), 
-                             np.repeat(1, self.state.__len__()))
-        return np.float32(self.state)
+        state = 2 * pop / self.bound - 1
+        return np.float32(np.clip(state, -1, 1))
     
     def population_units(self, state):
         pop = (state + 1) * self.bound /2
-        return np.clip(pop, 
-                       np.repeat(0, pop.__len__()),
-                       np.repeat(np.Inf, pop.__len__()))
+        return np.clip(pop, 0, np.Inf)
 
     def action_units(self, effort): 
         return np.array(effort, dtype=np.float32) * 2 - 1.
@@ -134,7 +183,11 @@ class fish(gym.Env):
         obs = self.population_units(observation)
         return obs, reward, terminated
     
-# SMOKE-TEST verify that the environment is defined correctly    
-from stable_baselines3.common.env_checker import check_env
-env = fish()
-check_env(env, warn=True)    
+# SMOKE-TEST verify that the environment is defined correctly:
+#   python -m envs.fish
+def check(config=None):
+    from stable_baselines3.common.env_checker import check_env
+    check_env(fish(config), warn=True)
+
+if __name__ == "__main__":
+    check()
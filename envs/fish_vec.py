@@ -0,0 +1,261 @@
+import copy
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv
+
+from envs.fish import fish
+from envs.rng import generators
+
+
+class FishVecEnv(VecEnv):
+    """
+    N replicates of a fish-style env, stepped together as one batch.
+
+    The state of every replicate lives in a single (n_envs, n_species) float32
+    array, and the env's `dynamics`, `harvest` and `utility` are called once
+    per step on the whole batch (they index species on the last axis, see
+    envs/fish.py). Finished replicates are reset automatically, as in any
+    stable-baselines3 VecEnv, so this can replace make_vec_env(fish, n):
+
+        vec_env = FishVecEnv(fish, 1000)
+        model = ARS("MlpPolicy", vec_env)
+
+    Every replicate draws its initial jitter and shocks from its own random
+    stream (see envs/rng.py), pre-drawn `block` steps at a time (the whole
+    episode unless that would exceed ~128MB). seed_lanes(seed, first) gives
+    the replicates streams first, first + 1, ... of seed, so results do not
+    depend on how replicates are split over batches or processes, and
+    replay(bank) makes them replay the shared shock paths of an
+    envs.shock_bank instead (common random numbers).
+    """
+    def __init__(self, env_fn=fish, n_envs=1, config=None, block=None):
+        # a single template env supplies config, parameters and model functions
+        self.env = env_fn(config) if config is not None else env_fn()
+        for attr in ["Tmax", "threshold", "init_sigma", "training", "initial_pop",
+                     "parameters", "dynamics", "harvest", "utility", "observe", "bound",
+                     "takes_noise"]:
+            setattr(self, attr, getattr(self.env, attr))
+        self.n_species = self.env.observation_space.shape[0]
+        self.n_actions = self.env.action_space.shape[0]
+        super().__init__(n_envs, self.env.observation_space, self.env.action_space)
+
+        self.state = np.zeros((n_envs, self.n_species), dtype=np.float32)
+        self.timestep = np.zeros(n_envs, dtype=np.int64)
+        self.actions = None
+
+        self.block = block or min(self.Tmax + 1, max(1, 2**24 // (n_envs * self.n_species)))
+        self.noise = np.zeros((n_envs, self.block, self.n_species))
+        self.cursor = np.zeros(n_envs, dtype=np.int64)
+        self.lanes = np.arange(n_envs)
+        self.bank = None
+        self.seed_lanes()
+
+
+    def seed_lanes(self, seed=None, first=0):
+        # replicate i draws from stream first + i of seed
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence, self.first = seed, first
+        self.rngs = generators(seed, self.num_envs, first)
+
+    def replay(self, bank, first=0):
+        # replicate i replays path first + i of an envs.shock_bank instead of
+        # drawing from its stream: one episode each, for evaluation
+        if len(bank) < first + self.num_envs or bank.noise.shape[1:] != (self.Tmax + 1, self.n_species):
+            raise ValueError("shock bank does not cover these replicates of this env")
+        self.bank, self.bank_first = bank, first
+        self.bank_rows = np.arange(first, first + self.num_envs)
+
+    # Lane management for evaluation loops that step with advance() (see
+    # run_episodes), not for stable-baselines3 training
+
+    def keep(self, idx):
+        # drop every lane but idx, e.g. those whose episodes have ended;
+        # the remaining lanes are renumbered 0, 1, ...
+        self.num_envs = len(idx)
+        self.state = self.state[idx]
+        self.timestep = self.timestep[idx]
+        self.cursor = self.cursor[idx]
+        self.noise = self.noise[idx]
+        self.rngs = [self.rngs[i] for i in idx]
+        self.lanes = np.arange(len(idx))
+        if self.bank is not None:
+            self.bank_rows = self.bank_rows[idx]
+
+    def start(self, idx, replicates):
+        # fresh episodes of replicates `replicates` in lanes idx: streams
+        # first + replicate of the seed, or paths of the bank
+        if self.bank is not None:
+            rows = self.bank_first + np.asarray(replicates)
+            if rows.max() >= len(self.bank):
+                raise ValueError("shock bank does not cover these replicates of this env")
+            self.bank_rows = self.bank_rows.copy()
+            self.bank_rows[idx] = rows
+        else:
+            self.rngs = list(self.rngs)
+            for i, replicate in zip(idx, replicates):
+                self.rngs[i] = generators(self.seed_sequence, 1, self.first + int(replicate))[0]
+        self.reset_lanes(idx)
+
+    def reset(self):
+        if self._seeds[0] is not None:
+            self.seed_lanes(self._seeds[0])
+            self._reset_seeds()
+        self.reset_lanes(self.lanes)
+        return self.observe(self.state)
+
+    def reset_lanes(self, idx):
+        # fresh episodes for replicates `idx`, jittering the initial population
+        if self.bank is not None:
+            jitter = self.bank.jitter[self.bank_rows[idx]]
+        else:
+            jitter = np.empty((len(idx), self.n_species))
+            for j, i in enumerate(idx):
+                jitter[j] = self.rngs[i].standard_normal(self.n_species)
+                if self.takes_noise:
+                    self.rngs[i].standard_normal(out=self.noise[i])
+        pop = np.multiply(self.initial_pop, 1 + np.float32(self.init_sigma * jitter))
+        self.state[idx] = self.state_units(pop)
+        self.timestep[idx] = 0
+        self.cursor[idx] = 0
+
+    def step_async(self, actions):
+        self.actions = actions
+
+    def step_wait(self):
+        obs, rewards, dones = self.advance(self.actions)
+        infos = [{} for _ in range(self.num_envs)]
+        if dones.any():
+            idx = np.flatnonzero(dones)
+            for i in idx:
+                infos[i]["terminal_observation"] = obs[i].copy()
+                infos[i]["TimeLimit.truncated"] = False
+            self.reset_lanes(idx)
+            obs = self.observe(self.state)
+        return obs, rewards, dones, infos
+
+    def advance(self, actions):
+        # one step of every replicate, without auto-reset
+        actions = np.reshape(actions, (self.num_envs, self.n_actions))
+        actions = np.clip(actions, self.action_space.low, self.action_space.high)
+        pop = self.population_units(self.state) # current state in natural units
+        effort = self.effort_units(actions)
+
+        # harvest and recruitment
+        rewards = self.utility(pop, effort, self.parameters)
+        if self.takes_noise:
+            nextpop = self.dynamics(pop, effort, self.harvest, self.parameters,
+                                    self.timestep, noise=self.draw())
+        else:
+            nextpop = self.dynamics(pop, effort, self.harvest, self.parameters, self.timestep)
+
+        self.timestep += 1
+        dones = self.timestep > self.Tmax
+
+        # in training mode only: punish for population collapse
+        if self.training:
+            collapsed = np.any(pop <= self.threshold, axis=-1)
+            rewards = rewards - collapsed * 50 / self.timestep
+            dones = dones | collapsed
+
+        self.state = self.state_units(nextpop) # transform into [-1, 1] space
+        observation = self.observe(self.state)
+        return observation, np.float32(rewards), dones
+
+    def draw(self):
+        # this step's shocks of every replicate, refilling spent blocks
+        if self.bank is not None:
+            noise = self.bank.noise[self.bank_rows, self.cursor]
+            self.cursor += 1
+            return noise
+        for i in np.flatnonzero(self.cursor == self.block):
+            self.rngs[i].standard_normal(out=self.noise[i])
+            self.cursor[i] = 0
+        noise = self.noise[self.lanes, self.cursor]
+        self.cursor += 1
+        return noise
+
+    def state_units(self, pop):
+        state = 2 * pop / self.bound - 1
+        return np.float32(np.clip(state, -1, 1))
+
+    def population_units(self, state):
+        pop = (state + 1) * self.bound / 2
+        return np.clip(pop, 0, np.Inf)
+
+    def action_units(self, effort):
+        return np.array(effort, dtype=np.float32) * 2 - 1.
+
+    def effort_units(self, action):
+        return (np.array(action, dtype=np.float32) + 1.) / 2
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self.env, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        # replicates share one configuration
+        setattr(self.env, attr_name, value)
+        if attr_name in self.__dict__:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self.env, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+
+def run_episodes(env, act, n_reps=None, compact=0.5, record=None):
+    """
+    Total reward and length of one episode of each of n_reps replicates
+    (env.num_envs by default), run on the lanes of a FishVecEnv.
+
+    act(obs, ids) returns the actions (on the env's [-1, 1] scale) for the
+    observations of the current lanes, which hold replicates ids. Episodes
+    end on collapse (training mode) or after Tmax steps. Finished lanes are
+    masked; with n_reps > env.num_envs they are refilled with the next
+    replicates, otherwise they are dropped from the batch once fewer than a
+    `compact` fraction of lanes is live, so the cost follows the number of
+    live steps. Replicate i draws the same stream however lanes are reused.
+    record(live, ids, t, obs, rewards), if given, is called after every step
+    with the positions of the live lanes in this step's batch, and their
+    replicates, timesteps, observations and rewards so far.
+    """
+    env = copy.copy(env) # lanes are dropped and reassigned in a copy of env
+    n_reps = n_reps or env.num_envs
+    rewards = np.zeros(n_reps)
+    steps = np.zeros(n_reps, dtype=np.int32)
+    ids = np.arange(min(n_reps, env.num_envs))
+    if len(ids) < env.num_envs:
+        env.keep(ids)
+    obs = env.reset()
+    active = np.ones(len(ids), dtype=bool)
+    following = len(ids) # next replicate to start
+    while active.any():
+        actions = act(obs, ids)
+        obs, reward, done = env.advance(actions)
+        live = np.flatnonzero(active)
+        rewards[ids[live]] += reward[live]
+        steps[ids[live]] += 1
+        if record is not None:
+            record(live, ids[live], env.timestep[live] - 1, obs[live], rewards[ids[live]])
+        active &= ~(done | (env.timestep >= env.Tmax))
+
+        idle = np.flatnonzero(~active)
+        if following < n_reps and len(idle):
+            slots = idle[:n_reps - following]
+            ids = ids.copy()
+            ids[slots] = np.arange(following, following + len(slots))
+            following += len(slots)
+            env.start(slots, ids[slots])
+            obs = np.array(obs)
+            obs[slots] = env.observe(env.state[slots])
+            active[slots] = True
+        elif active.any() and active.mean() < compact:
+            live = np.flatnonzero(active)
+            env.keep(live)
+            ids, obs, active = ids[live], obs[live], active[live]
+    return rewards, steps
@@ -0,0 +1,102 @@
+import hashlib
+import numpy as np
+
+# Time-varying parameters. A model's parameters may carry a "forcing" dict of
+# schedules, {name: schedule}, whose value at each timestep is added to
+# p[name]:
+#
+#     parameters = {"r_x": 0.03, ..., "forcing": {"r_x": sinusoid(-0.03, 300)}}
+#     r = seasonal(p, "r_x", timestep)
+#
+# A schedule is tabulated once per timestep (precompute(Tmax), or on first
+# use) into a read-only array shared by every lane of a batched env and
+# inherited by forked workers, so stepping is a table lookup. Timesteps may be
+# an int or an array of per-lane timesteps.
+
+class schedule:
+    table = np.zeros(0)
+
+    def values(self, t):
+        raise NotImplementedError
+
+    def precompute(self, Tmax):
+        if len(self.table) <= Tmax:
+            table = np.asarray(self.values(np.arange(Tmax + 1)), dtype=np.float64)
+            table.setflags(write=False)
+            self.table = table
+        return self.table
+
+    def __call__(self, timestep):
+        try:
+            return self.table[timestep]
+        except IndexError:
+            self.precompute(2 * int(np.max(timestep)) + 1)
+            return self.table[timestep]
+
+
+class sinusoid(schedule):
+    """amplitude * sin(2 pi (t - phase) / period)"""
+    def __init__(self, amplitude, period, phase=0):
+        self.amplitude, self.period, self.phase = amplitude, period, phase
+
+    def values(self, t):
+        return self.amplitude * np.sin(2 * np.pi * (t - self.phase) / self.period)
+
+    def __repr__(self):
+        return f"sinusoid({self.amplitude!r}, {self.period!r}, {self.phase!r})"
+
+
+class piecewise(schedule):
+    """values[k] from times[k] until the next time (0 before times[0])"""
+    def __init__(self, times, values):
+        self.times = np.asarray(times)
+        self.levels = np.concatenate([[0], np.asarray(values, dtype=np.float64)])
+
+    def values(self, t):
+        return self.levels[np.searchsorted(self.times, t, side="right")]
+
+    def __repr__(self):
+        return f"piecewise({self.times.tolist()!r}, {self.levels[1:].tolist()!r})"
+
+
+class series(schedule):
+    """
+    A recorded series, one value per timestep (the last value holds after
+    it ends): an array, or the path of a .npy or one-column text/csv file.
+    Values may be arrays, e.g. a (T, n, n) series of matrices.
+    """
+    def __init__(self, data):
+        if isinstance(data, str):
+            data = np.load(data) if data.endswith(".npy") else np.loadtxt(data, delimiter=",", ndmin=1)
+        self.data = np.asarray(data, dtype=np.float64)
+
+    def values(self, t):
+        return self.data[np.minimum(t, len(self.data) - 1)]
+
+    def __repr__(self):
+        return f"series({hashlib.sha1(self.data.tobytes()).hexdigest()[:16]})"
+
+
+class formula(schedule):
+    """fn(t) for an array of timesteps t, e.g. a product of sinusoids"""
+    def __init__(self, fn):
+        self.fn = fn
+
+    def values(self, t):
+        return self.fn(t)
+
+    def __repr__(self):
+        return f"formula({self.fn.__module__}.{self.fn.__qualname__})"
+
+
+def seasonal(p, name, timestep):
+    # p[name] plus its scheduled term at timestep, if it has one
+    f = p.get("forcing", {}).get(name)
+    if f is None:
+        return p[name]
+    return p[name] + f(timestep)
+
+
+def precompute(p, Tmax):
+    for f in p.get("forcing", {}).values():
+        f.precompute(Tmax)
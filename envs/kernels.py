@@ -0,0 +1,226 @@
+import numpy as np
+
+# Optional compiled backend: whole-episode rollouts of fixed-form policies
+# (constant effort, constant escapement, threshold) run as nopython kernels.
+# Without numba the same kernels run as plain Python, and envs with a custom
+# config["dynamics"] keep using the Python-callable path (utils.batch_rewards).
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+def jit(parallel=False):
+    if njit is None:
+        return lambda f: f
+    return njit(cache=True, parallel=parallel)
+
+
+# fixed-form policies: effort of each action is
+#   CONSTANT:   value
+#   ESCAPEMENT: whatever harvest leaves `value` of the target species behind
+#   THRESHOLD:  `value` when the target species is at or above `level`, else 0
+CONSTANT, ESCAPEMENT, THRESHOLD = 0, 1, 2
+
+# parameters are packed into float64 arrays in these orders
+fish_names = ["r_x", "K", "sigma_x", "q_0", "price"]
+caribou_names = ["r_x", "r_y", "K", "beta", "v0", "D", "tau_yx", "tau_xy",
+                 "alpha", "dH", "sigma_x", "sigma_y", "sigma_z"]
+apparent_competition_names = ["r_x", "r_y", "K", "beta", "v0", "h_x", "h_y",
+                              "tau_yx", "tau_xy", "alpha", "dH",
+                              "sigma_x", "sigma_y", "sigma_z"]
+
+def pack(p, names):
+    return np.array([p[name] for name in names], dtype=np.float64)
+
+
+# Each model step takes the population x (natural units, updated in place),
+# effort, packed parameters, timestep, a standard-normal draw per species and
+# the collapse threshold. It returns the utility and whether any species fell
+# to the threshold after harvest, mirroring the order of operations in the envs.
+
+@jit()
+def fish_step(x, effort, p, t, eps, threshold):
+    r_x, K, sigma_x, q0, price = p[0], p[1], p[2], p[3], p[4]
+    reward = effort[0] * x[0] * q0 * price - .00001 * effort.sum()
+    if x[0] <= 0.001:
+        reward -= 10
+    x[0] = x[0] * (1 - effort[0] * q0)
+    collapsed = x[0] <= threshold
+
+    r = r_x - 0.03 * np.sin(2 * np.pi * t / 300)
+    X = x[0]
+    x[0] = X + r * X * (1 - X / K) + sigma_x * X * eps[0]
+    return reward, collapsed
+
+@jit()
+def caribou_step(x, effort, p, t, eps, threshold):
+    r_x, r_y, K, beta0, v0, D0, tau_yx, tau_xy = p[0], p[1], p[2], p[3], p[4], p[5], p[6], p[7]
+    alpha, dH, sigma_x, sigma_y, sigma_z = p[8], p[9], p[10], p[11], p[12]
+    reward = 0.5 * x[1] - .00001 * (effort[0] + effort[1])
+    if x[0] <= 0.01 or x[1] <= 0.01 or x[2] <= 0.01:
+        reward -= 1
+    x[0] = x[0] * (1 - effort[0] * 0.5) # moose cull
+    x[2] = x[2] * (1 - effort[1] * 0.5) # wolf cull
+    collapsed = x[0] <= threshold or x[1] <= threshold or x[2] <= threshold
+
+    D = D0 + 0.5 * np.sin(2 * np.pi * t / 3200)
+    beta = beta0 + 0.2 * np.sin(2 * np.pi * t / 3200)
+    X, Y, Z = x[0], x[1], x[2]
+    X += (r_x * X * (1 - (X + tau_xy * Y) / K)
+          - (1 - D) * beta * Z * X**2 / (v0**2 + X**2)
+          + sigma_x * X * eps[0])
+    Y += (r_y * Y * (1 - (Y + tau_yx * X) / K)
+          - D * beta * Z * Y**2 / (v0**2 + Y**2)
+          + sigma_y * Y * eps[1])
+    Z += (alpha * beta * Z * ((1 - D) * X**2 / (v0**2 + X**2) + D * Y**2 / (v0**2 + Y**2))
+          - dH * Z + sigma_z * Z * eps[2])
+    x[0], x[1], x[2] = X, Y, Z
+    return reward, collapsed
+
+@jit()
+def apparent_competition_step(x, effort, p, t, eps, threshold):
+    r_x, r_y, K, beta, v0, h_x, h_y = p[0], p[1], p[2], p[3], p[4], p[5], p[6]
+    tau_yx, tau_xy, alpha, dH, sigma_x, sigma_y, sigma_z = p[7], p[8], p[9], p[10], p[11], p[12], p[13]
+    reward = x[0] - .00001 * (effort[0] + effort[1])
+    if x[0] <= 0.0001 or x[1] <= 0.0001 or x[2] <= 0.0001:
+        reward -= 10
+    x[1] = x[1] * (1 - effort[0] * 0.2) # moose cull
+    x[2] = x[2] * (1 - effort[1] * 0.2) # wolf cull
+    collapsed = x[0] <= threshold or x[1] <= threshold or x[2] <= threshold
+
+    X, Y, Z = x[0], x[1], x[2]
+    X += (r_x * X * (1 - (X + tau_xy * Y) / K)
+          - beta * Z * X**2 / (v0**2 + h_x * X**2 + h_y * Y**2)
+          + sigma_x * X * eps[0])
+    Y += (r_y * Y * (1 - (Y + tau_yx * X) / K)
+          - beta * Z * Y**2 / (v0**2 + h_x * X**2 + h_y * Y**2)
+          + sigma_y * Y * eps[1])
+    Z += (alpha * beta * Z * (Y**2 + X**2) / (v0**2 + h_x * X**2 + h_y * Y**2)
+          - dH * Z + sigma_z * Z * eps[2])
+    x[0], x[1], x[2] = X, Y, Z
+    return reward, collapsed
+
+
+def make_episode(step):
+    # Compile one episode of the model `step` under a fixed-form policy,
+    # updating x in place. policy is (n_actions, 4): value, level, target
+    # species and catchability of each action; noise is (Tmax, n_species).
+    @jit()
+    def episode(x, p, kind, policy, noise, bound, training, threshold):
+        Tmax, n_species = noise.shape
+        n_actions = policy.shape[0]
+        effort = np.zeros(n_actions)
+        total = 0.0
+        t = 0
+        while t < Tmax:
+            for j in range(n_actions):
+                value, level = policy[j, 0], policy[j, 1]
+                s, q = int(policy[j, 2]), policy[j, 3]
+                if kind == CONSTANT:
+                    effort[j] = value
+                elif kind == ESCAPEMENT:
+                    effort[j] = (1 - value / x[s]) / q if x[s] > 0 else 0.
+                elif x[s] >= level:
+                    effort[j] = value
+                else:
+                    effort[j] = 0.
+                effort[j] = min(max(effort[j], 0.), 1.)
+
+            reward, collapsed = step(x, effort, p, t, noise[t], threshold)
+            for k in range(n_species):
+                x[k] = min(max(x[k], 0.), bound)
+            t += 1
+            # in training mode only: punish for population collapse
+            if training and collapsed:
+                return total + reward - 50 / t, t
+            total += reward
+        return total, t
+    return episode
+
+fish_episode = make_episode(fish_step)
+caribou_episode = make_episode(caribou_step)
+apparent_competition_episode = make_episode(apparent_competition_step)
+
+
+# model codes understood by rollout_kernel
+FISH, CARIBOU, APPARENT_COMPETITION = 0, 1, 2
+
+# Advance many trajectories, from initial states x0 (n_reps, n_species)
+# with noise (n_reps, Tmax, n_species), for Tmax steps in one call
+@jit(parallel=True)
+def rollout_kernel(model, x0, p, kind, policy, noise, bound, training, threshold):
+    n_reps = noise.shape[0]
+    rewards = np.zeros(n_reps)
+    final = x0.copy()
+    steps = np.zeros(n_reps, dtype=np.int64)
+    for i in prange(n_reps):
+        if model == FISH:
+            rewards[i], steps[i] = fish_episode(final[i], p, kind, policy, noise[i],
+                                                bound, training, threshold)
+        elif model == CARIBOU:
+            rewards[i], steps[i] = caribou_episode(final[i], p, kind, policy, noise[i],
+                                                   bound, training, threshold)
+        else:
+            rewards[i], steps[i] = apparent_competition_episode(final[i], p, kind, policy, noise[i],
+                                                                bound, training, threshold)
+    return rewards, final, steps
+
+
+# model name -> (model code, parameter names, (target species, catchability) per action)
+models = {
+    "fish": (FISH, fish_names, lambda p: [(0, p["q_0"])]),
+    "caribou": (CARIBOU, caribou_names, lambda p: [(0, 0.5), (2, 0.5)]),
+    "apparent_competition": (APPARENT_COMPETITION, apparent_competition_names,
+                             lambda p: [(1, 0.2), (2, 0.2)]),
+}
+
+
+def rollout(env, kind, value, level=0., n_reps=100, model="fish", chunk=4096,
+            seed=None):
+    """
+    Episode rewards of n_reps replicates of env under a fixed-form policy.
+
+    value (and level, for THRESHOLD) are given per action in natural units.
+    The env supplies parameters, Tmax, initial_pop, init_sigma, bound,
+    training and threshold; `model` names the compiled dynamics to use.
+    Replicate i draws from random stream i of seed (see envs/rng.py).
+    Returns rewards, final populations and episode lengths.
+    """
+    from envs.rng import generators
+    code, names, targets = models[model]
+    p = pack(env.parameters, names)
+    targets = targets(env.parameters)
+    policy = np.zeros((len(targets), 4))
+    policy[:, 0] = value
+    policy[:, 1] = level
+    policy[:, 2:] = targets
+
+    initial_pop = np.asarray(env.initial_pop, dtype=np.float64)
+    n_species = len(initial_pop)
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    results = []
+    # draw noise a chunk of replicates at a time to bound memory
+    for start in range(0, n_reps, chunk):
+        n = min(chunk, n_reps - start)
+        jitter = np.empty((n, n_species))
+        noise = np.empty((n, env.Tmax, n_species))
+        for i, rng in enumerate(generators(seed, n, start)):
+            jitter[i] = rng.standard_normal(n_species)
+            noise[i] = rng.standard_normal((env.Tmax + 1, n_species))[:env.Tmax]
+        x0 = initial_pop * (1 + env.init_sigma * jitter)
+        results.append(rollout_kernel(code, x0, p, kind, policy, noise, float(env.bound),
+                                      bool(env.training), float(env.threshold)))
+    return tuple(np.concatenate(r) for r in zip(*results))
+
+
+def compiled_model(env):
+    # name of the compiled model matching env's model functions, or None when
+    # env was configured with its own dynamics (use the Python path instead)
+    from envs import fish, caribou, apparent_competition
+    for name, module in [("fish", fish), ("caribou", caribou),
+                         ("apparent_competition", apparent_competition)]:
+        if (env.dynamics, env.harvest, env.utility) == (module.dynamics, module.harvest, module.utility):
+            return name
+    return None
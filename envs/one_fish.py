@@ -38,9 +38,10 @@ class one_fish(gym.Env):
         self.reset(seed=config.get("seed", None))
 
     def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
         self.timestep = 0
         self.state = self.state_units(self.initial_pop)
-        self.state += np.float32(self.parameters["sigma"] * np.random.normal(size=1) )
+        self.state += np.float32(self.parameters["sigma"] * self.np_random.normal(size=1) )
         info = {}
         return self.state, info
 
@@ -73,7 +74,7 @@ class one_fish(gym.Env):
     def population_growth(self, pop):
         X = pop[0]
         p = self.parameters
-        X += p["r"] * X * (1 - X / p["K"]) + p["sigma"] * X * np.random.normal()
+        X += p["r"] * X * (1 - X / p["K"]) + p["sigma"] * X * self.np_random.normal()
         pop = np.array([X], dtype=np.float32)
         return(pop)
 
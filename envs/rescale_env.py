@@ -10,8 +10,9 @@ class rescale_env(gym.Env):
       self.rl_env = env
       self.Tmax = env.Tmax
     def reset(self, *, seed=None, options=None):
-      state, info = self.rl_env.reset()
-      return self.rl_env.population(), info
+      state, info = self.rl_env.reset(seed=seed)
+      obs = np.array((state + 1) * self.rl_env.bound / 2, dtype=np.float32)
+      return np.clip(obs, 0, np.Inf), info
     def step(self, effort):
       action = 2 * effort - 1
       observation, reward, terminated, done, info = self.rl_env.step(action)
@@ -0,0 +1,14 @@
+import numpy as np
+
+# Counter-based random streams. Replicate i of a seed draws from a Philox
+# generator keyed by the seed, with its counter starting at block i << 192,
+# so replicate i sees the same numbers however many replicates are run
+# alongside it, in one batch or split over worker processes.
+
+def generators(seed=None, n=1, first=0):
+    """np.random.Generator streams of replicates first, ..., first + n - 1"""
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    key = seed.generate_state(2, np.uint64)
+    return [np.random.Generator(np.random.Philox(counter=[0, 0, 0, i], key=key))
+            for i in range(first, first + n)]
@@ -5,6 +5,8 @@ import numpy as np
 import gymnasium as gym
 from gymnasium import spaces
 
+from envs.forcing import sinusoid, seasonal, precompute
+
 class s3a2(gym.Env):
     """A 3-species ecosystem model with two control actions"""
     def __init__(self, config=None):
@@ -26,7 +28,8 @@ class s3a2(gym.Env):
          "sigma_x": np.float32(0.05),
          "sigma_y": np.float32(0.05),
          "sigma_z": np.float32(0.05),
-         "cost": np.float32(0.01)
+         "cost": np.float32(0.01),
+         "forcing": {"K_x": sinusoid(0.01, 30)},
         }
         initial_pop = np.array([0.8396102377828771, 
                                 0.05489978383850558,
@@ -42,6 +45,7 @@ class s3a2(gym.Env):
         self.parameters = config.get("parameters", parameters)
         
         self.bound = 2 * self.parameters["K_x"]
+        precompute(self.parameters, self.Tmax)
         
         self.action_space = spaces.Box(
             np.array([-1, -1], dtype=np.float32),
@@ -57,9 +61,10 @@ class s3a2(gym.Env):
 
 
     def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
         self.timestep = 0
         self.state = self.update_state(self.initial_pop)
-        self.state += np.float32(self.init_sigma * np.random.normal(size=3) )
+        self.state += np.float32(self.init_sigma * self.np_random.normal(size=3) )
         info = {}
         return self.state, info
 
@@ -97,20 +102,20 @@ class s3a2(gym.Env):
         p = self.parameters
         
         coupling = p["v0"]**2 #+ 0.02 * np.sin(2 * np.pi * self.timestep / 60)
-        K_x = p["K_x"] + 0.01 * np.sin(2 * np.pi * self.timestep / 30)
+        K_x = seasonal(p, "K_x", self.timestep)
 
         X += (p["r_x"] * X * (1 - X / K_x)
               - p["beta"] * Z * (X**2) / (coupling + X**2)
               - p["cV"] * X * Y
               + p["tau_yx"] * Y - p["tau_xy"] * X  
-              + p["sigma_x"] * X * np.random.normal()
+              + p["sigma_x"] * X * self.np_random.normal()
              )
         
         Y += (p["r_y"] * Y * (1 - Y / p["K_y"] )
               - p["D"] * p["beta"] * Z * (Y**2) / (coupling + Y**2)
               - p["cV"] * X * Y
               - p["tau_yx"] * Y + p["tau_xy"] * X  
-              + p["sigma_y"] * Y * np.random.normal()
+              + p["sigma_y"] * Y * self.np_random.normal()
              )
 
         Z = Z + p["alpha"] * (
@@ -118,12 +123,12 @@ class s3a2(gym.Env):
                                              X**2 / (coupling + X**2) 
                                              + p["D"] * Y**2 / (coupling + Y**2)
                                              ) - p["dH"]) 
-                              + p["sigma_z"] * Z  * np.random.normal()
+                              + p["sigma_z"] * Z  * self.np_random.normal()
                              )        
         
         # consider adding the handling-time component here too instead of these   
         #Z = Z + p["alpha"] * (Z * (p["f"] * (X + p["D"] * Y) - p["dH"]) 
-        #                      + p["sigma_z"] * Z  * np.random.normal())
+        #                      + p["sigma_z"] * Z  * self.np_random.normal())
                               
         pop = np.array([X, Y, Z], dtype=np.float32)
         return(pop)
@@ -0,0 +1,53 @@
+import os
+import numpy as np
+
+from envs.rng import generators
+
+
+class shock_bank:
+    """
+    Pre-drawn initial-population jitter and environmental shocks (the
+    standard normal draws that `dynamics` scales by sigma_x etc.) of a fixed
+    set of replicates, replayed by every policy evaluated against it, see
+    FishVecEnv.replay and utils.compare_policies. Replicate i holds what
+    stream i of the seed gives a seeded env (envs/rng.py), so replaying a
+    bank reproduces evaluate_policy(..., seeds=seed) exactly.
+
+    Given a path, the arrays are written there as .npy files and memory-mapped,
+    so a large bank is generated once and shared by sessions and processes:
+
+        bank = shock_bank.generate(fish(), 10_000, seed=0, path="bank")
+        bank = shock_bank.load("bank")
+    """
+    def __init__(self, jitter, noise):
+        self.jitter = jitter # (n_reps, n_species)
+        self.noise = noise   # (n_reps, Tmax + 1, n_species)
+
+    def __len__(self):
+        return len(self.jitter)
+
+    @classmethod
+    def generate(cls, env, n_reps = 1000, seed = None, path = None):
+        n_species = len(env.initial_pop)
+        shapes = {"jitter": (n_reps, n_species), "noise": (n_reps, env.Tmax + 1, n_species)}
+        if path is None:
+            arrays = {name: np.empty(shape) for name, shape in shapes.items()}
+        else:
+            os.makedirs(path, exist_ok=True)
+            arrays = {name: np.lib.format.open_memmap(os.path.join(path, name + ".npy"),
+                                                     mode="w+", dtype=np.float64, shape=shape)
+                      for name, shape in shapes.items()}
+        # in the order a seeded env draws them: jitter, then the episode's shocks
+        for i, rng in enumerate(generators(seed, n_reps)):
+            rng.standard_normal(out=arrays["jitter"][i])
+            rng.standard_normal(out=arrays["noise"][i])
+        if path is None:
+            return cls(arrays["jitter"], arrays["noise"])
+        for array in arrays.values():
+            array.flush()
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path):
+        return cls(np.load(os.path.join(path, "jitter.npy"), mmap_mode="r"),
+                   np.load(os.path.join(path, "noise.npy"), mmap_mode="r"))
@@ -57,9 +57,10 @@ class three_fish(gym.Env):
 
 
     def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
         self.timestep = 0
         self.state = self.update_state(self.initial_pop)
-        self.state += np.float32(self.init_sigma * np.random.normal(size=3) )
+        self.state += np.float32(self.init_sigma * self.np_random.normal(size=3) )
         info = {}
         return self.state, info
 
@@ -103,14 +104,14 @@ class three_fish(gym.Env):
               - p["beta"] * Z * (X**2) / (coupling + X**2)
               - p["cV"] * X * Y
               + p["tau_yx"] * Y - p["tau_xy"] * X  
-              + p["sigma_x"] * X * np.random.normal()
+              + p["sigma_x"] * X * self.np_random.normal()
              )
         
         Y += (p["r_y"] * Y * (1 - Y / p["K_y"] )
               - p["D"] * p["beta"] * Z * (Y**2) / (coupling + Y**2)
               - p["cV"] * X * Y
               - p["tau_yx"] * Y + p["tau_xy"] * X  
-              + p["sigma_y"] * Y * np.random.normal()
+              + p["sigma_y"] * Y * self.np_random.normal()
              )
 
         Z = Z + p["alpha"] * (
@@ -118,12 +119,12 @@ class three_fish(gym.Env):
                                              X**2 / (coupling + X**2) 
                                              + p["D"] * Y**2 / (coupling + Y**2)
                                              ) - p["dH"]) 
-                              + p["sigma_z"] * Z  * np.random.normal()
+                              + p["sigma_z"] * Z  * self.np_random.normal()
                              )        
         
         # consider adding the handling-time component here too instead of these   
         #Z = Z + p["alpha"] * (Z * (p["f"] * (X + p["D"] * Y) - p["dH"]) 
-        #                      + p["sigma_z"] * Z  * np.random.normal())
+        #                      + p["sigma_z"] * Z  * self.np_random.normal())
                               
         pop = np.array([X, Y, Z], dtype=np.float32)
         return(pop)
@@ -0,0 +1,127 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+from utils import batch_rewards
+
+cache_dir = os.path.expanduser("~/.cache/rl-minicourse/evaluations")
+
+
+def jsonable(v):
+    try:
+        return np.asarray(v, dtype=np.float64).tolist()
+    except (TypeError, ValueError):
+        return repr(v)
+
+
+def policy_key(agent):
+    # class and attributes of a fixed-form agent (policies.py, or the notebooks'
+    # some_agent). Agents holding other state, e.g. SB3 models, need a key= of
+    # their own, as their repr changes from session to session.
+    cls = type(agent)
+    return {"class": f"{cls.__module__}.{cls.__qualname__}",
+            "params": {k: jsonable(v) for k, v in sorted(vars(agent).items())}}
+
+
+def env_key(env):
+    # everything a fish-style env's episodes depend on (see sdp/grid.py)
+    from sdp.grid import fingerprint, model_key
+    return model_key(env.parameters, env.dynamics, env.harvest, env.utility,
+                     env=type(env).__qualname__, observe=fingerprint(env.observe),
+                     Tmax=int(env.Tmax), threshold=float(env.threshold),
+                     init_sigma=float(env.init_sigma), training=bool(env.training),
+                     initial_pop=jsonable(env.initial_pop), bound=float(env.bound))
+
+
+def seed_key(seed):
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return {"entropy": str(seed.entropy), "spawn_key": list(seed.spawn_key)}
+
+
+class evaluation_cache:
+    """
+    Episode rewards of replicates of an agent in an env, stored on disk so
+    that repeated evaluations only simulate what has not been seen before:
+
+        cache = evaluation_cache()
+        def g(x):
+            return -evaluate_policy(some_agent(x), fish, 100, seeds=0, cache=cache)["mean"]
+
+    Rewards are kept per (policy, env configuration, seed), one entry per
+    replicate: replicate i always draws random stream i of the seed (see
+    envs/rng.py), so asking for more replicates, or for the same point in a
+    later session, only simulates the replicates that are missing. Files not
+    used recently are removed once the cache exceeds max_bytes.
+    """
+    def __init__(self, path = cache_dir, max_bytes = 2**28):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def rewards(self, agent, env_factory, n_reps = 100, seeds = 0, first = 0, key = None):
+        """Rewards of replicates first, ..., first + n_reps - 1 of seeds"""
+        if seeds is None:
+            raise ValueError("evaluation_cache needs seeds: unseeded replicates never repeat")
+        from envs.fish_vec import FishVecEnv
+        spec = [key if key is not None else policy_key(agent),
+                env_key(env_factory()), seed_key(seeds)]
+        name = hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+        path = os.path.join(self.path, name + ".npy")
+
+        # NaN marks replicates not simulated yet
+        stored = self.load(path)
+        end = first + n_reps
+        if len(stored) < end:
+            stored = np.concatenate([stored, np.full(end - len(stored), np.nan)])
+        missing = np.flatnonzero(np.isnan(stored[first:end])) + first
+        # each contiguous run of missing replicates is simulated as one batch
+        for run in np.split(missing, np.flatnonzero(np.diff(missing) > 1) + 1):
+            if len(run):
+                env = FishVecEnv(env_factory, len(run))
+                env.seed_lanes(seeds, int(run[0]))
+                stored[run] = batch_rewards(agent, env)
+        if len(missing):
+            self.save(path, stored)
+        self.hits += n_reps - len(missing)
+        self.misses += len(missing)
+        return stored[first:end].copy()
+
+    def load(self, path):
+        try:
+            stored = np.load(path)
+            os.utime(path) # most recently used
+            return stored
+        except (FileNotFoundError, ValueError):
+            return np.zeros(0)
+
+    def save(self, path, stored):
+        os.makedirs(self.path, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, stored)
+        os.replace(tmp, path)
+        self.evict(keep = path)
+
+    def evict(self, keep = None):
+        # drop least recently used files until the cache fits in max_bytes
+        files = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".npy"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path != keep:
+                os.remove(path)
+                total -= size
+
+    def clear(self):
+        if os.path.isdir(self.path):
+            for entry in os.scandir(self.path):
+                if entry.name.endswith(".npy"):
+                    os.remove(entry.path)
@@ -0,0 +1,158 @@
+import numpy as np
+
+# Deterministic actions of stable-baselines3 MLP policies (ARS, PPO, A2C, SAC,
+# TQC, TD3) without torch: export_policy() writes the weights of the action
+# path to an .npz file that numpy_policy() loads with numpy alone.
+#
+#     export_policy(ARS.load("ars_fish"), "ars_fish.npz")
+#     agent = numpy_policy("ars_fish.npz")
+#     action, _ = agent.predict(obs)
+
+# activations, applied after each layer's clip to [low, high]
+IDENTITY, TANH, RELU, ELU, SIGMOID = 0, 1, 2, 3, 4
+activations = {"Tanh": TANH, "ReLU": RELU, "ELU": ELU, "Sigmoid": SIGMOID}
+
+
+def action_modules(policy):
+    # torch modules from observation to (pre-squash) action, in order
+    import torch.nn as nn
+    if hasattr(policy, "mlp_extractor"): # PPO, A2C: mean of the action distribution
+        modules = [policy.mlp_extractor.policy_net, policy.action_net]
+        if policy.squash_output:
+            modules.append(nn.Tanh())
+    elif hasattr(policy, "actor") and hasattr(policy.actor, "latent_pi"): # SAC, TQC
+        modules = [policy.actor.latent_pi, policy.actor.mu, nn.Tanh()]
+    elif hasattr(policy, "actor"): # TD3, DDPG
+        modules = [policy.actor.mu]
+    else: # ARS
+        modules = [policy.action_net]
+    flat = []
+    for m in modules:
+        flat.extend(m if isinstance(m, nn.Sequential) else [m])
+    return flat
+
+
+def export_policy(model, path):
+    """Write the deterministic action path of an SB3 model to path (.npz)"""
+    import torch.nn as nn
+    from gymnasium import spaces
+    policy = model.policy
+    if not (isinstance(policy.observation_space, spaces.Box)
+            and isinstance(policy.action_space, spaces.Box)
+            and len(policy.observation_space.shape) == 1):
+        raise ValueError("only flat Box observation and action spaces are supported")
+
+    arrays = {}
+    n = -1
+    for m in action_modules(policy):
+        if isinstance(m, nn.Linear):
+            n += 1
+            weight = m.weight.detach().cpu().numpy().T
+            arrays[f"weight_{n}"] = np.ascontiguousarray(weight, dtype=np.float32)
+            bias = m.bias.detach().cpu().numpy() if m.bias is not None else np.zeros(m.out_features)
+            arrays[f"bias_{n}"] = bias.astype(np.float32)
+            arrays[f"clip_{n}"] = np.array([-np.inf, np.inf], dtype=np.float32)
+            arrays[f"activation_{n}"] = np.array(IDENTITY)
+        elif n < 0 or arrays[f"activation_{n}"] != IDENTITY:
+            raise ValueError(f"unsupported layer sequence at {m}")
+        elif isinstance(m, nn.Hardtanh):
+            arrays[f"clip_{n}"] = np.array([m.min_val, m.max_val], dtype=np.float32)
+        elif type(m).__name__ in activations:
+            arrays[f"activation_{n}"] = np.array(activations[type(m).__name__])
+        elif not isinstance(m, nn.Identity):
+            raise ValueError(f"unsupported layer {m}")
+
+    np.savez(path, n_layers=n + 1, squash=policy.squash_output,
+             low=policy.action_space.low, high=policy.action_space.high, **arrays)
+
+
+def activate(x, code):
+    if code == TANH:
+        return np.tanh(x, out=x)
+    if code == RELU:
+        return np.maximum(x, 0, out=x)
+    if code == ELU:
+        return np.where(x > 0, x, np.expm1(x))
+    if code == SIGMOID:
+        return 1 / (1 + np.exp(-x))
+    return x
+
+
+class numpy_policy:
+    """
+    An exported policy (see export_policy) with the SB3 predict signature.
+    predict always returns the deterministic action; with use_numba, the
+    forward pass runs as one compiled kernel (envs/kernels.py backend).
+    """
+    def __init__(self, path, use_numba = False):
+        with np.load(path) as f:
+            n = int(f["n_layers"])
+            self.layers = [(f[f"weight_{i}"], f[f"bias_{i}"], f[f"clip_{i}"],
+                            int(f[f"activation_{i}"])) for i in range(n)]
+            self.squash = bool(f["squash"])
+            self.low, self.high = f["low"], f["high"]
+        self.forward = self.numpy
+        if use_numba:
+            from numba.typed import List
+            weights, biases, clips, codes = zip(*self.layers)
+            self.kernel_args = tuple(List(np.ascontiguousarray(a) for a in arrays)
+                                     for arrays in (weights, biases, clips)) + (np.array(codes),)
+            self.kernel = compiled_mlp()
+            self.forward = self.compiled
+
+    def predict(self, observation, state = None, episode_start = None,
+                deterministic = True):
+        obs = np.asarray(observation, dtype=np.float32)
+        action = self.forward(np.atleast_2d(obs))
+        if self.squash:
+            action = self.low + 0.5 * (action + 1.0) * (self.high - self.low)
+        else:
+            action = np.clip(action, self.low, self.high)
+        return action.reshape(obs.shape[:-1] + action.shape[-1:]), state
+
+    def numpy(self, x):
+        for weight, bias, (low, high), code in self.layers:
+            x = x @ weight
+            x += bias
+            if low > -np.inf or high < np.inf:
+                np.clip(x, low, high, out=x)
+            x = activate(x, code)
+        return x
+
+    def compiled(self, x):
+        return self.kernel(np.ascontiguousarray(x), *self.kernel_args)
+
+
+mlp = None
+
+def compiled_mlp():
+    # numba is only imported once a compiled policy is asked for
+    global mlp
+    if mlp is None:
+        from envs.kernels import jit
+        mlp = jit()(mlp_kernel)
+    return mlp
+
+
+def mlp_kernel(x, weights, biases, clips, codes):
+    for k in range(len(weights)):
+        weight, bias = weights[k], biases[k]
+        low, high, code = clips[k][0], clips[k][1], codes[k]
+        y = np.empty((x.shape[0], weight.shape[1]), dtype=np.float32)
+        for i in range(x.shape[0]):
+            for j in range(weight.shape[1]):
+                s = bias[j]
+                for l in range(weight.shape[0]):
+                    s += x[i, l] * weight[l, j]
+                s = min(max(s, low), high)
+                if code == TANH:
+                    s = np.tanh(s)
+                elif code == RELU:
+                    s = max(s, 0.)
+                elif code == ELU:
+                    s = s if s > 0 else np.expm1(s)
+                elif code == SIGMOID:
+                    s = 1 / (1 + np.exp(-s))
+                y[i, j] = s
+        x = y
+    return x
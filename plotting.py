@@ -0,0 +1,34 @@
+import polars as pl
+from plotnine import ggplot, aes, geom_line, geom_point
+
+from utils import policy_surface
+
+# Plots of simulations and policies. Kept apart from utils so that code which
+# only simulates does not import polars and plotnine; utils.plot_sim and
+# utils.policy_fn load this module on first use.
+
+
+def plot_sim(df, 
+             scnema = ["t", "reward",  "effort", "X"],
+             variables = ["t", "effort", "X"],
+             geom = "line"
+            ):
+    # frames from simulate / simulate_rl, or lists of rows built by hand
+    if not isinstance(df, pl.DataFrame):
+        df = pl.DataFrame(df, schema=scnema, orient="row")
+    dfl = (df.
+            select(variables).
+            unpivot(index = "t")
+          )
+    if geom == "line":
+        return ggplot(dfl, aes("t", "value", color="variable")) + geom_line()
+    else:
+        return ggplot(dfl, aes("t", "value", color="variable")) + geom_point()
+
+
+
+def policy_fn(agent, env, N = 10, geom = "line"):
+    dfl = policy_surface(agent, env, N)
+    if geom == 'line':
+        return ggplot(dfl, aes("obs", "action")) + geom_line()
+    return ggplot(dfl, aes("obs", "action")) + geom_point()
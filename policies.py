@@ -0,0 +1,38 @@
+import numpy as np
+
+# Fixed-form policies acting in natural units, like the agents used with
+# utils.simulate. predict() works on one observation or a batch of them, and
+# take(idx) narrows a policy with one parameter per replicate to replicates idx.
+
+class constant_effort:
+    """The same effort regardless of the observation (one row per replicate if 2-D)"""
+    def __init__(self, effort):
+        self.effort = np.asarray(effort, dtype=np.float32)
+
+    def predict(self, obs, **kwargs):
+        return self.effort
+
+    def take(self, idx):
+        # the policy of replicates idx, as batched rollouts drop finished lanes
+        return constant_effort(self.effort[idx] if self.effort.ndim == 2 else self.effort)
+
+
+class constant_escapement:
+    """
+    Harvest down to a fixed escapement: the effort that leaves `escapement`
+    of the harvested species after harvest, given its catchability (q_0 in
+    envs/fish.py). Escapement may hold one level per replicate, as (N, 1).
+    """
+    def __init__(self, escapement, catchability = 0.1):
+        self.escapement = np.asarray(escapement, dtype=np.float32)
+        self.catchability = catchability
+
+    def predict(self, obs, **kwargs):
+        pop = np.asarray(obs, dtype=np.float32)[..., :1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            effort = (1 - self.escapement / pop) / self.catchability
+        return np.clip(np.nan_to_num(effort), 0, 1)
+
+    def take(self, idx):
+        escapement = self.escapement[idx] if self.escapement.ndim == 2 else self.escapement
+        return constant_escapement(escapement, self.catchability)
@@ -0,0 +1,82 @@
+import numpy as np
+
+# Evaluation of saved stable-baselines3 agents on a local process pool.
+# Replicates are split into shards; each worker loads the model once and steps
+# a shard as one FishVecEnv (envs/fish_vec.py), calling predict on the whole
+# batch of observations at every step. Replicate i draws random stream i of
+# the seed, so results do not depend on n_workers or shard_size.
+
+model = None # the worker's copy of the agent
+
+
+def load_model(algo, path):
+    # algo is an algorithm class or its name, e.g. "ARS", "PPO", "TQC";
+    # policies exported to .npz (numpy_policy.py) load without torch
+    if str(path).endswith(".npz"):
+        from numpy_policy import numpy_policy
+        return numpy_policy(path)
+    if isinstance(algo, str):
+        import importlib
+        for package in ["stable_baselines3", "sb3_contrib"]:
+            module = importlib.import_module(package)
+            if hasattr(module, algo):
+                algo = getattr(module, algo)
+                break
+        else:
+            raise ValueError(f"unknown algorithm {algo}")
+    return algo.load(path, device="cpu")
+
+
+def init_worker(algo, path):
+    global model
+    if not str(path).endswith(".npz"):
+        import torch
+        torch.set_num_threads(1) # one core per worker
+    model = load_model(algo, path)
+
+
+def evaluate_model(path, algo, env_factory, n_reps = 1000, seeds = None,
+                   n_workers = None, shard_size = 1000, deterministic = True):
+    """
+    Episode rewards of n_reps replicates of env_factory() under the agent
+    saved at path (e.g. "ars_fish.zip", algo = "ARS", or an exported
+    "ars_fish.npz", see numpy_policy.py).
+
+    Shards of shard_size replicates run on n_workers processes (in this
+    process if n_workers is None). Returns a polars frame of rep, reward
+    and steps (episode length), one row per replicate.
+    """
+    import polars as pl
+    if not isinstance(seeds, np.random.SeedSequence):
+        seeds = np.random.SeedSequence(seeds)
+    args = [(env_factory, min(shard_size, n_reps - first), seeds, first, deterministic)
+            for first in range(0, n_reps, shard_size)]
+    if n_workers:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(n_workers, initializer=init_worker,
+                                 initargs=(algo, path)) as pool:
+            shards = list(pool.map(run_shard, *zip(*args)))
+    else:
+        agent = load_model(algo, path)
+        shards = [run_shard(*a, agent=agent) for a in args]
+    return pl.concat(shards)
+
+
+def run_shard(env_factory, n_reps, seed, first, deterministic, agent = None):
+    import polars as pl
+    from envs.fish_vec import FishVecEnv
+    env = FishVecEnv(env_factory, n_reps)
+    env.seed_lanes(seed, first)
+    rewards, steps = rl_rewards(agent or model, env, deterministic)
+    return pl.DataFrame({"rep": np.arange(first, first + n_reps),
+                         "reward": rewards,
+                         "steps": steps})
+
+
+# like utils.batch_rewards, for agents acting on the env's [-1, 1] scale;
+# returns episode rewards and lengths
+def rl_rewards(agent, env, deterministic = True, n_reps = None, compact = 0.5):
+    from envs.fish_vec import run_episodes
+    def act(obs, ids):
+        return agent.predict(obs, deterministic=deterministic)[0]
+    return run_episodes(env, act, n_reps, compact)
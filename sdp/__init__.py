@@ -0,0 +1,3 @@
+from sdp.transitions import poisson_transitions
+from sdp.solvers import (action_values, value_iteration, policy_iteration,
+                         modified_policy_iteration, gauss_seidel_value_iteration)
@@ -0,0 +1,113 @@
+import os
+import json
+import hashlib
+import numpy as np
+from scipy import sparse
+
+from envs import fish
+from sdp.solvers import policy_iteration
+
+cache_dir = os.path.expanduser("~/.cache/rl-minicourse/sdp")
+
+
+def fingerprint(fn):
+    # changes whenever the function's code or constants change
+    code = fn.__code__
+    return hashlib.sha1(code.co_code + repr(code.co_consts).encode()).hexdigest()
+
+
+def model_key(parameters, dynamics, harvest, utility, **grid):
+    # schedules (envs/forcing.py) enter by their repr
+    spec = {"parameters": {k: float(v) if np.ndim(v) == 0 and not isinstance(v, dict) else repr(v)
+                           for k, v in parameters.items()},
+            "functions": [fingerprint(f) for f in (dynamics, harvest, utility)],
+            "grid": grid}
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def grid_model(parameters = fish.parameters, dynamics = fish.dynamics,
+               harvest = fish.harvest, utility = fish.utility,
+               n_states = 201, n_efforts = 51, n_nodes = 21, timestep = 0,
+               cache = True):
+    """
+    Discretized MDP of a single-species env model (envs/fish.py by default).
+
+    Population is gridded on n_states points over [0, 2K] (the env's state
+    bound) and effort on n_efforts points over [0, 1]. The transition kernel
+    integrates the standard normal shock of `dynamics` by Gauss-Hermite
+    quadrature on n_nodes points, all state/effort/node combinations in one
+    vectorized call, and splits each next state linearly between its two
+    neighbouring grid points. Seasonal terms are frozen at `timestep`.
+
+    Returns states, efforts, the stacked CSR transition matrix (as used by
+    the sdp solvers) and the (states x efforts) reward. Results are cached
+    on disk under a hash of the parameters, model functions and grid.
+    """
+    key = model_key(parameters, dynamics, harvest, utility, n_states=n_states,
+                    n_efforts=n_efforts, n_nodes=n_nodes, timestep=timestep)
+    path = os.path.join(cache_dir, key + ".npz")
+    if cache and os.path.exists(path):
+        with np.load(path) as f:
+            transition = sparse.csr_matrix((f["data"], f["indices"], f["indptr"]),
+                                           shape=tuple(f["shape"]))
+            return f["states"], f["efforts"], transition, f["reward"]
+
+    states = np.linspace(0, 2 * parameters["K"], n_states)
+    efforts = np.linspace(0, 1, n_efforts)
+    nodes, weights = np.polynomial.hermite_e.hermegauss(n_nodes)
+    weights = weights / weights.sum()
+
+    # (efforts, states, nodes, species) arrays for one batched call of the model
+    shape = (n_efforts, n_states, n_nodes, 1)
+    pop = np.broadcast_to(states[None, :, None, None], shape).copy()
+    effort = np.broadcast_to(efforts[:, None, None, None], shape).copy()
+    noise = np.broadcast_to(nodes[None, None, :, None], shape)
+    reward = utility(pop[:, :, 0], effort[:, :, 0], parameters).T
+    nextpop = dynamics(pop, effort, harvest, parameters, timestep, noise=noise)[..., 0]
+
+    # linear interpolation of next states onto the grid
+    position = np.clip(nextpop, 0, states[-1]) / (states[1] - states[0])
+    lower = np.minimum(np.floor(position).astype(np.int64), n_states - 2)
+    upper_weight = position - lower
+    rows = np.broadcast_to(np.arange(n_efforts * n_states).reshape(n_efforts, n_states, 1),
+                           nextpop.shape)
+    transition = sparse.csr_matrix(
+        (np.concatenate([(weights * (1 - upper_weight)).ravel(), (weights * upper_weight).ravel()]),
+         (np.concatenate([rows.ravel(), rows.ravel()]),
+          np.concatenate([lower.ravel(), lower.ravel() + 1]))),
+        shape=(n_efforts * n_states, n_states))
+    transition.eliminate_zeros()
+
+    if cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez(path, data=transition.data, indices=transition.indices,
+                 indptr=transition.indptr, shape=transition.shape,
+                 states=states, efforts=efforts, reward=reward)
+    return states, efforts, transition, reward
+
+
+def solve(env = None, discount = 0.99, solver = policy_iteration, **grid):
+    """
+    Optimal policy of a fish env (default configuration if env is None),
+    solved on a grid_model() discretization of its own model functions.
+
+    Returns the solver's result with the grid, the optimal effort per grid
+    state and an `agent` usable with utils.simulate / evaluate_policy.
+    """
+    env = env or fish.fish()
+    states, efforts, transition, reward = grid_model(env.parameters, env.dynamics,
+                                                     env.harvest, env.utility, **grid)
+    result = solver(transition, reward, discount)
+    result.update(states=states, efforts=efforts, effort=efforts[result["policy"]])
+    result["agent"] = grid_agent(states, result["effort"])
+    return result
+
+
+class grid_agent:
+    """Effort interpolated from an optimal policy on a population grid"""
+    def __init__(self, states, effort):
+        self.states = states
+        self.effort = effort
+
+    def predict(self, obs, **kwargs):
+        return np.interp(np.asarray(obs)[..., 0], self.states, self.effort)[..., None]
@@ -0,0 +1,138 @@
+import time
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+
+# Bellman backup: action values Q[state, action] for value-to-go V, where
+# transition stacks one (states x states) block per action (see transitions.py)
+def action_values(transition, utility, discount, V):
+    n_states, n_actions = utility.shape
+    return utility + discount * (transition @ V).reshape(n_actions, n_states).T
+
+
+def value_iteration(transition, utility, discount, tol = 1e-4, max_iter = 10_000, V = None):
+    """
+    Value iteration as one sparse mat-vec product per sweep.
+
+    utility is (states x actions), transition the stacked sparse matrix from
+    poisson_transitions(). Iterates until the span of the change in value is
+    below tol * (1 - discount) / discount, giving a tol-optimal policy (the
+    same stopping rule as mdptoolbox.mdp.ValueIteration).
+    Returns a dict with the value, the optimal action index per state
+    (the smallest action among ties), iterations and wall time.
+    """
+    start = time.perf_counter()
+    V = np.zeros(utility.shape[0]) if V is None else V
+    threshold = tol * (1 - discount) / discount
+    for iteration in range(1, max_iter + 1):
+        Q = action_values(transition, utility, discount, V)
+        V_next = Q.max(axis=1)
+        change = V_next - V
+        V = V_next
+        if change.max() - change.min() < threshold:
+            break
+    return {"value": V,
+            "policy": Q.argmax(axis=1),
+            "iterations": iteration,
+            "time": time.perf_counter() - start}
+
+
+# transition matrix and utility of the states under a fixed policy
+def policy_model(transition, utility, policy):
+    n_states = utility.shape[0]
+    states = np.arange(n_states)
+    return transition[policy * n_states + states], utility[states, policy]
+
+
+def improve(Q, policy = None):
+    # greedy policy, keeping the current action wherever it is still optimal
+    # so that ties cannot make policy iteration cycle
+    best = Q.argmax(axis=1)
+    if policy is None:
+        return best
+    current = Q[np.arange(len(policy)), policy]
+    return np.where(current >= Q.max(axis=1), policy, best)
+
+
+def policy_iteration(transition, utility, discount, max_iter = 1_000, policy = None):
+    """
+    Howard's policy iteration: each evaluation step solves the sparse linear
+    system (I - discount * P_policy) V = U_policy exactly, each improvement
+    step is one Bellman backup. Stops when the policy no longer changes,
+    usually after a handful of iterations.
+    """
+    start = time.perf_counter()
+    n_states = utility.shape[0]
+    policy = utility.argmax(axis=1) if policy is None else policy
+    identity = sparse.identity(n_states, format="csc")
+    for iteration in range(1, max_iter + 1):
+        P, U = policy_model(transition, utility, policy)
+        V = spsolve(identity - discount * P.tocsc(), U)
+        next_policy = improve(action_values(transition, utility, discount, V), policy)
+        if np.array_equal(next_policy, policy):
+            break
+        policy = next_policy
+    return {"value": V,
+            "policy": policy,
+            "iterations": iteration,
+            "time": time.perf_counter() - start}
+
+
+def modified_policy_iteration(transition, utility, discount, tol = 1e-4, sweeps = 20,
+                              max_iter = 10_000, V = None):
+    """
+    Modified policy iteration: the policy is evaluated only approximately,
+    by `sweeps` cheap sparse backups under the current policy between
+    improvement steps. Stops on the same rule as value_iteration().
+    """
+    start = time.perf_counter()
+    V = np.zeros(utility.shape[0]) if V is None else V
+    threshold = tol * (1 - discount) / discount
+    for iteration in range(1, max_iter + 1):
+        Q = action_values(transition, utility, discount, V)
+        policy = improve(Q)
+        change = Q.max(axis=1) - V
+        V = V + change
+        if change.max() - change.min() < threshold:
+            break
+        P, U = policy_model(transition, utility, policy)
+        for _ in range(sweeps):
+            V = U + discount * (P @ V)
+    return {"value": V,
+            "policy": policy,
+            "iterations": iteration,
+            "time": time.perf_counter() - start}
+
+
+def gauss_seidel_value_iteration(transition, utility, discount, tol = 1e-4, block_size = 16,
+                                 max_iter = 10_000, V = None):
+    """
+    Gauss-Seidel value iteration: states are backed up in order, block_size
+    at a time, each block already using the values updated earlier in the
+    same sweep. block_size = 1 is the classic state-by-state scheme; larger
+    blocks trade a little convergence speed for fewer sparse products.
+    Stops on the same rule as value_iteration().
+    """
+    start = time.perf_counter()
+    n_states, n_actions = utility.shape
+    V = np.zeros(n_states) if V is None else V.copy()
+    threshold = tol * (1 - discount) / discount
+    # rows of every action for each block of states, sliced out once
+    blocks = []
+    for first in range(0, n_states, block_size):
+        states = np.arange(first, min(first + block_size, n_states))
+        rows = (np.arange(n_actions)[:, None] * n_states + states).ravel()
+        blocks.append((states, transition[rows]))
+    for iteration in range(1, max_iter + 1):
+        V_prev = V.copy()
+        for states, P in blocks:
+            Q = utility[states] + discount * (P @ V).reshape(n_actions, len(states)).T
+            V[states] = Q.max(axis=1)
+        change = V - V_prev
+        if change.max() - change.min() < threshold:
+            break
+    return {"value": V,
+            "policy": action_values(transition, utility, discount, V).argmax(axis=1),
+            "iterations": iteration,
+            "time": time.perf_counter() - start}
@@ -0,0 +1,48 @@
+import numpy as np
+from scipy import sparse
+from scipy.stats import poisson
+
+
+def poisson_transitions(Nmax, actions, dynamic, n_sd = 6, max_entries = 2**22):
+    """
+    Sparse transition matrix of a population model with Poisson noise.
+
+    States are the population sizes 0, ..., Nmax-1. From state k under
+    action actions[i] the next state is Poisson distributed with mean
+    dynamic(k, actions[i]) (dynamic must broadcast over arrays), and the last
+    state absorbs the upper tail. Mass more than n_sd standard deviations
+    from the mean (padded by n_sd states) is dropped and rows renormalized,
+    so a row stores O(sqrt(mean)) entries instead of Nmax.
+
+    Returns a CSR matrix with len(actions) * Nmax rows: row i * Nmax + k is
+    the distribution of the next state from state k under action i.
+    """
+    states = np.arange(Nmax)
+    actions = np.asarray(actions, dtype=float)
+    mean = np.broadcast_to(dynamic(states[None, :], actions[:, None]),
+                           (len(actions), Nmax)).ravel().astype(float)
+    sd = np.sqrt(mean) + 1 # keeps windows wide enough at small means
+    lo = np.clip(np.floor(mean - n_sd * sd), 0, Nmax - 1).astype(np.int64)
+    hi = np.clip(np.ceil(mean + n_sd * sd), 0, Nmax - 1).astype(np.int64)
+    counts = hi - lo + 1
+    indptr = np.concatenate([[0], np.cumsum(counts)])
+    indices = np.empty(indptr[-1], dtype=np.int64)
+    data = np.empty(indptr[-1])
+
+    # rows are filled in blocks of at most max_entries (row x window) cells
+    width = counts.max()
+    block = max(1, max_entries // width)
+    for start in range(0, len(mean), block):
+        rows = slice(start, start + block)
+        cols = lo[rows, None] + np.arange(width)
+        keep = cols <= hi[rows, None]
+        p = poisson.pmf(cols, mean[rows, None])
+        tail = cols == Nmax - 1
+        p[tail] = poisson.sf(Nmax - 2, np.broadcast_to(mean[rows, None], cols.shape)[tail])
+        p = np.where(keep, p, 0)
+        p /= p.sum(axis=1, keepdims=True)
+        entries = slice(indptr[start], indptr[min(start + block, len(mean))])
+        indices[entries] = cols[keep]
+        data[entries] = p[keep]
+
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(mean), Nmax))
@@ -0,0 +1,127 @@
+import os
+import uuid
+import numpy as np
+
+species_names = ["X", "Y", "Z"]
+
+
+# names of the action and species columns of a trajectory
+def column_names(n_actions = 1, n_species = 1):
+    actions = ["effort"] if n_actions == 1 else [f"effort_{i}" for i in range(n_actions)]
+    species = (species_names[:n_species] if n_species <= len(species_names)
+               else [f"X{i}" for i in range(n_species)])
+    return actions, species
+
+
+class recorder:
+    """
+    Trajectories of one or more episodes as preallocated, typed columns.
+
+    Columns are rep (int32), t (int32), reward (float64, cumulative within
+    the episode), one float32 column per action ("effort", or "effort_0",
+    "effort_1", ...) and one per species ("X", "Y", "Z", ...), sized for
+    Tmax steps x reps and filled in place. frame() hands the filled part to
+    polars without copying.
+    """
+    def __init__(self, Tmax, reps = 1, n_actions = 1, n_species = 1):
+        self.actions, self.species = column_names(n_actions, n_species)
+        size = Tmax * reps
+        self.columns = {"rep": np.zeros(size, dtype=np.int32),
+                        "t": np.zeros(size, dtype=np.int32),
+                        "reward": np.zeros(size, dtype=np.float64)}
+        for name in self.actions + self.species:
+            self.columns[name] = np.zeros(size, dtype=np.float32)
+        self.action_columns = [self.columns[name] for name in self.actions]
+        self.species_columns = [self.columns[name] for name in self.species]
+        self.n = 0
+
+    @classmethod
+    def for_env(cls, env, reps = 1):
+        return cls(env.Tmax, reps, env.action_space.shape[0], env.observation_space.shape[0])
+
+    def record(self, rep, t, reward, action, obs):
+        i = self.n
+        self.columns["rep"][i] = rep
+        self.columns["t"][i] = t
+        self.columns["reward"][i] = reward
+        for column, value in zip(self.action_columns, np.ravel(action)):
+            column[i] = value
+        for column, value in zip(self.species_columns, np.ravel(obs)):
+            column[i] = value
+        self.n += 1
+
+    def frame(self):
+        import polars as pl
+        return pl.DataFrame({name: column[:self.n] for name, column in self.columns.items()})
+
+
+class parquet_sink:
+    """
+    Streams trajectory frames to disk as they are produced.
+
+    Frames passed to write() are buffered and written as one Parquet row
+    group (or Arrow IPC record batch, format="ipc") per row_group_size rows,
+    so a campaign never has to fit in memory. Keyword arguments name the
+    partition, e.g. parquet_sink("sims", policy="ppo", parameters="a1b2")
+    writes under sims/policy=ppo/parameters=a1b2/; read everything back
+    lazily with scan("sims").
+    """
+    def __init__(self, path, row_group_size = 1_000_000, format = "parquet", **partition):
+        self.dir = os.path.join(path, *[f"{key}={value}" for key, value in partition.items()])
+        self.file = os.path.join(self.dir, f"part-{uuid.uuid4().hex}.{format}")
+        self.row_group_size = row_group_size
+        self.format = format
+        self.buffer = []
+        self.buffered = 0
+        self.writer = None
+
+    def write(self, frame):
+        # frames are buffered without copying: don't modify them afterwards
+        import polars as pl
+        if not isinstance(frame, pl.DataFrame):
+            frame = pl.DataFrame(frame)
+        self.buffer.append(frame.to_arrow())
+        self.buffered += frame.height
+        if self.buffered >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        import pyarrow as pa
+        table = pa.concat_tables(self.buffer)
+        if self.writer is None:
+            os.makedirs(self.dir, exist_ok=True)
+            if self.format == "ipc":
+                self.writer = pa.ipc.new_file(self.file, table.schema)
+            else:
+                import pyarrow.parquet as pq
+                self.writer = pq.ParquetWriter(self.file, table.schema)
+        if self.format == "ipc":
+            self.writer.write_table(table)
+        else:
+            self.writer.write_table(table, row_group_size=len(table))
+        self.buffer = []
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Lazy frame over every file written by parquet_sinks under path, with the
+# partition keys as columns, so filters are pushed down to the files
+def scan(path, format = "parquet"):
+    import polars as pl
+    files = os.path.join(path, "**", f"*.{format}")
+    if format == "ipc":
+        return pl.scan_ipc(files, hive_partitioning=True)
+    return pl.scan_parquet(files, hive_partitioning=True)
@@ -1,73 +1,396 @@
 import numpy as np
 
-def simulate(agent, env, timeseries = True):
-    # initial conditions
-    df = []
-    episode_reward = 0
-    obs, _ = env.reset()
+from trajectory import recorder, column_names
+
+# polars is imported where frames are built, and the plotting helpers live in
+# plotting.py (polars + plotnine), so simulation-only imports stay light
+def __getattr__(name):
+    if name in ("plot_sim", "policy_fn"):
+        import plotting
+        return getattr(plotting, name)
+    raise AttributeError(f"module 'utils' has no attribute '{name}'")
+
+
+# Trajectories are recorded in a trajectory.recorder and returned as a polars
+# frame (rep, t, reward, effort, X, ...), with the final episode reward
+# (an array of them if reps > 1). Given a trajectory.parquet_sink, each
+# episode is streamed to disk instead and no frame is returned.
+def simulate(agent, env, timeseries = True, reps = 1, sink = None):
+    rec = recorder.for_env(env, reps if timeseries and sink is None else 0)
+    rewards = np.zeros(reps)
+    for rep in range(reps):
+      if sink is not None:
+          rec = recorder.for_env(env)
+      # initial conditions
+      episode_reward = 0
+      obs, _ = env.reset()
     
-    for t in range(env.Tmax):
-      action = agent.predict(obs, deterministic=True)
-      obs, reward, done = env.time_step(action)
-      episode_reward += reward
-      if timeseries:
-          df.append([t, episode_reward, action, obs])
-      if done:
-        break
-    return df, episode_reward
+      for t in range(env.Tmax):
+        action = agent.predict(obs, deterministic=True)
+        obs, reward, done = env.time_step(action)
+        episode_reward += reward
+        if timeseries or sink is not None:
+            rec.record(rep, t, episode_reward, action, obs)
+        if done:
+          break
+      rewards[rep] = episode_reward
+      if sink is not None:
+          sink.write(rec.frame())
+    df = rec.frame() if sink is None else None
+    return df, rewards[0] if reps == 1 else rewards
 
 
 # When agent.predict uses RL's -1, 1
-def simulate_rl(agent, env, timeseries = True):
-    df = []
-    episode_reward = 0
-    observation, _ = env.reset()
-    for t in range(env.Tmax):
-      action, _ = agent.predict(observation, deterministic=True)
-      observation, reward, terminated, done, info = env.step(action)
-      episode_reward += reward
-
-      if timeseries:
-          effort = env.effort_units(action)
-          obs = env.population_units(observation) # natural units
-          df.append([t, episode_reward, *effort, *obs])
-      if terminated or done:
-        break
+def simulate_rl(agent, env, timeseries = True, reps = 1, sink = None):
+    rec = recorder.for_env(env, reps if timeseries and sink is None else 0)
+    rewards = np.zeros(reps)
+    for rep in range(reps):
+      if sink is not None:
+          rec = recorder.for_env(env)
+      episode_reward = 0
+      observation, _ = env.reset()
+      for t in range(env.Tmax):
+        action, _ = agent.predict(observation, deterministic=True)
+        observation, reward, terminated, done, info = env.step(action)
+        episode_reward += reward
+
+        if timeseries or sink is not None:
+            effort = env.effort_units(action)
+            obs = env.population_units(observation) # natural units
+            rec.record(rep, t, episode_reward, effort, obs)
+        if terminated or done:
+          break
+      rewards[rep] = episode_reward
+      if sink is not None:
+          sink.write(rec.frame())
     
-    return df, episode_reward
+    df = rec.frame() if sink is None else None
+    return df, rewards[0] if reps == 1 else rewards
+
+
+# Monte Carlo evaluation: all replicates advance together as one batch
+# (see envs/fish_vec.py), so cost no longer grows with Python steps per replicate.
+# Replicate i uses random stream i of `seeds`, whatever n_reps is. Given an
+# eval_cache.evaluation_cache, only replicates not evaluated before are simulated.
+#
+# Given a target_se, or an incumbent to race against (the stats of the best
+# policy so far, or its mean reward), n_reps is only the budget: replicates are
+# added batch_size at a time until the standard error reaches target_se, or
+# until the policy is worse than the incumbent at the given confidence level.
+# The first k replicates are always the same, and stats["n_reps"] reports how
+# many were used.
+def evaluate_policy(agent, env_factory, n_reps = 100, seeds = None,
+                    quantiles = (0.05, 0.5, 0.95), sink = None, cache = None,
+                    target_se = None, incumbent = None, batch_size = 20, level = 0.95):
+    if cache is not None and sink is not None:
+        raise ValueError("cached replicates have no trajectories to stream to sink")
+    adaptive = target_se is not None or incumbent is not None
+    batch_size = max(2, min(batch_size, n_reps)) if adaptive else n_reps
+    if isinstance(incumbent, dict):
+        incumbent = incumbent["mean"]
+
+    rewards = np.zeros(0)
+    while len(rewards) < n_reps:
+        n, first = min(batch_size, n_reps - len(rewards)), len(rewards)
+        if cache is not None:
+            batch = cache.rewards(agent, env_factory, n, seeds, first)
+        else:
+            from envs.fish_vec import FishVecEnv
+            env = FishVecEnv(env_factory, n)
+            env.seed_lanes(seeds, first)
+            batch = batch_rewards(agent, env, sink, first)
+        rewards = np.concatenate([rewards, batch])
+        if adaptive and finished(rewards, target_se, incumbent, level):
+            break
+
+    n_reps = len(rewards)
+    stats = {"mean": np.mean(rewards),
+             "se": np.std(rewards, ddof=1) / np.sqrt(n_reps) if n_reps > 1 else np.nan,
+             "n_reps": n_reps}
+    for q, value in zip(quantiles, np.quantile(rewards, quantiles)):
+        stats[f"q{round(q * 100):02d}"] = value
+    stats["rewards"] = rewards
+    return stats
+
+
+def finished(rewards, target_se, incumbent, level):
+    # enough replicates: precise enough, or confidently worse than the incumbent
+    from scipy import stats
+    n = len(rewards)
+    if n < 2:
+        return False
+    se = np.std(rewards, ddof=1) / np.sqrt(n)
+    if target_se is not None and se <= target_se:
+        return True
+    z = stats.t.ppf((1 + level) / 2, n - 1)
+    return incumbent is not None and np.mean(rewards) + z * se < incumbent
+
+
+# Common random numbers: every policy in `agents` (name -> agent) replays the
+# same shock paths of an envs.shock_bank, so policies are compared replicate
+# by replicate and the difference between two close policies needs far fewer
+# replicates than comparing independent runs (independent_se shows what that
+# would give). Agents named in `scaled` act on the env's [-1, 1] scale (SB3
+# models, numpy_policy). Returns a summary with each policy's paired
+# difference from `baseline` (the first policy by default) and its confidence
+# interval, and a frame of the rewards of every replicate.
+def compare_policies(agents, env_factory, bank, baseline = None, scaled = (), level = 0.95):
+    import polars as pl
+    from scipy import stats
+    from envs.fish_vec import FishVecEnv
+    from rollouts import rl_rewards
+    rewards = {}
+    for name, agent in agents.items():
+        env = FishVecEnv(env_factory, len(bank))
+        env.replay(bank)
+        rewards[name] = rl_rewards(agent, env)[0] if name in scaled else batch_rewards(agent, env)
+
+    n = len(bank)
+    baseline = baseline if baseline is not None else next(iter(agents))
+    base = rewards[baseline]
+    se = {name: r.std(ddof=1) / np.sqrt(n) for name, r in rewards.items()}
+    z = stats.t.ppf((1 + level) / 2, n - 1)
+    rows = []
+    for name, r in rewards.items():
+        diff = r - base
+        diff_se = diff.std(ddof=1) / np.sqrt(n)
+        rows.append({"policy": name, "mean": r.mean(), "se": se[name],
+                     "diff": diff.mean(), "diff_se": diff_se,
+                     "lower": diff.mean() - z * diff_se, "upper": diff.mean() + z * diff_se,
+                     "independent_se": np.sqrt(se[name]**2 + se[baseline]**2)})
+    return pl.DataFrame(rows), pl.DataFrame({"rep": np.arange(n), **rewards})
+
+
+# episode reward of each replicate of a batched env under agent,
+# which acts in natural units like the agents used with `simulate`.
+# Finished lanes are dropped or refilled as in envs.fish_vec.run_episodes;
+# agents holding one parameter per replicate (policies.py) are narrowed to
+# the live lanes with their take(). Given a trajectory.parquet_sink, the
+# trajectories of all replicates are streamed to it step by step, with
+# first + the replicate index as rep.
+def batch_rewards(agent, env, sink = None, first = 0, n_reps = None, compact = 0.5):
+    from envs.fish_vec import run_episodes
+    view = {"ids": None}
+    def act(obs, ids):
+        if ids is not view["ids"]:
+            view.update(ids=ids, agent=agent.take(ids) if hasattr(agent, "take") else agent)
+        view["effort"] = batch_predict(view["agent"], env.population_units(obs), env.n_actions)
+        return env.action_units(view["effort"])
 
+    record = None
+    if sink is not None:
+        actions, species = column_names(env.n_actions, env.n_species)
+        def record(live, ids, t, obs, rewards):
+            columns = {"rep": (first + ids).astype(np.int32),
+                       "t": t.astype(np.int32),
+                       "reward": rewards}
+            columns.update(zip(actions, np.float32(view["effort"][live].T)))
+            columns.update(zip(species, np.float32(env.population_units(obs).T)))
+            sink.write(columns)
+    return run_episodes(env, act, n_reps, compact, record)[0]
 
 
-import polars as pl
-from plotnine import ggplot, aes, geom_line, geom_point
+def batch_predict(agent, obs, n_actions = 1):
+    # agents written for one observation at a time (e.g. `if obs < threshold`)
+    # are applied row by row
+    try:
+        action = agent.predict(obs, deterministic=True)
+    except ValueError:
+        action = [agent.predict(o, deterministic=True) for o in obs]
+    action = np.asarray(action, dtype=np.float32)
+    if action.size == n_actions: # same action for every replicate
+        return np.broadcast_to(action.reshape(n_actions), (len(obs), n_actions))
+    return action.reshape(len(obs), n_actions)
 
 
-def plot_sim(df, 
-             scnema = ["t", "reward",  "effort", "X"],
-             variables = ["t", "effort", "X"],
-             geom = "line"
-            ):
-    dfl = (pl.DataFrame(df, schema=scnema, orient="row").
-            select(variables).
-            unpivot(index = "t")
-          )
-    if geom == "line":
-        return ggplot(dfl, aes("t", "value", color="variable")) + geom_line()
+# Constant-effort sweep (e.g. to locate F_MSY): every effort level x replicate
+# is one lane of a batched simulation, see policy_sweep
+def msy_sweep(env_factory, efforts, n_reps = 30, n_workers = None,
+              max_lanes = 100_000, seed = None, max_reps = None, target_se = None,
+              race = False, checkpoint = None):
+    from policies import constant_effort
+    return policy_sweep(env_factory, constant_effort, efforts, n_reps, n_workers,
+                        max_lanes, seed, name = "effort", max_reps = max_reps,
+                        target_se = target_se, race = race, checkpoint = checkpoint)
+
+
+# Constant-escapement optimizer: each round evaluates n_levels escapement
+# levels x n_reps replicates as one batched simulation, then zooms in on the
+# neighbourhood of the best level. Returns the escapement curve and optimum.
+# With max_reps and race, levels far from the optimum stop at n_reps replicates.
+def optimize_escapement(env_factory, n_levels = 200, n_reps = 100, rounds = 2,
+                        n_workers = None, seed = None, max_reps = None, race = False,
+                        checkpoint = None):
+    import polars as pl
+    from policies import constant_escapement
+    env = env_factory()
+    catchability = env.parameters.get("q_0", 1)
+    lower, upper = 0, float(env.bound)
+    seeds = np.random.SeedSequence(seed).spawn(rounds)
+    curve = []
+    for s in seeds:
+        levels = np.linspace(lower, upper, n_levels)
+        curve.append(policy_sweep(env_factory, constant_escapement, levels, n_reps,
+                                  n_workers, seed = s, name = "escapement",
+                                  max_reps = max_reps, race = race, checkpoint = checkpoint,
+                                  catchability = catchability))
+        best = curve[-1]["escapement"][curve[-1]["mean"].arg_max()]
+        step = levels[1] - levels[0]
+        lower, upper = max(best - step, 0), best + step
+    curve = pl.concat(curve).unique("escapement").sort("escapement")
+    return curve, curve.filter(pl.col("mean") == pl.col("mean").max())
+
+
+# Sweep a fixed-form policy (see policies.py) over levels of its parameter:
+# every level x replicate is one lane of a batched simulation. Lanes are split
+# into shards of at most max_lanes, optionally run on a local process pool, and
+# each shard is reduced to per-level summaries before it is returned, so
+# memory stays bounded. Lane i draws random stream i of seed, so results are
+# the same for any n_workers or max_lanes.
+#
+# Given max_reps, replicates are added in rounds of n_reps (up to max_reps per
+# level), and only to the levels that still need them: those whose standard
+# error is above target_se and, with race, those not yet confidently worse
+# than the best level. n_reps in the result counts each level's replicates.
+#
+# Given a checkpoint directory, every finished shard is saved there, and
+# rerunning the same sweep (with the same seed) after a crash only runs the
+# shards that are missing. Use one directory per env configuration.
+def policy_sweep(env_factory, policy, levels, n_reps = 30, n_workers = None,
+                 max_lanes = 100_000, seed = None, name = "level", max_reps = None,
+                 target_se = None, race = False, confidence = 0.95, checkpoint = None,
+                 **kwargs):
+    import polars as pl
+    levels = np.asarray(levels, dtype=np.float32)
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    if max_reps is None:
+        return sweep_round(env_factory, policy, levels, n_reps, n_workers, max_lanes,
+                           seed, kwargs, checkpoint).rename({"level": name})
+
+    from scipy import stats
+    count = np.zeros(len(levels), dtype=np.int64)
+    mean, m2 = np.zeros(len(levels)), np.zeros(len(levels))
+    low, high = np.full(len(levels), np.inf), np.full(len(levels), -np.inf)
+    active = np.ones(len(levels), dtype=bool)
+    for s in seed.spawn(max(1, max_reps // n_reps)):
+        idx = np.flatnonzero(active)
+        summary = sweep_round(env_factory, policy, levels[idx], n_reps, n_workers,
+                              max_lanes, s, kwargs, checkpoint)
+        # pool this round's n_reps replicates into each level's running mean
+        # and sum of squared deviations
+        total = count[idx] + n_reps
+        delta = summary["mean"].to_numpy() - mean[idx]
+        m2[idx] += (summary["se"].to_numpy()**2 * n_reps * (n_reps - 1)
+                    + delta**2 * count[idx] * n_reps / total)
+        mean[idx] += delta * n_reps / total
+        count[idx] = total
+        low[idx] = np.minimum(low[idx], summary["min"].to_numpy())
+        high[idx] = np.maximum(high[idx], summary["max"].to_numpy())
+
+        se = np.sqrt(m2 / (count - 1) / count)
+        if target_se is not None:
+            active &= se > target_se
+        if race:
+            z = stats.t.ppf((1 + confidence) / 2, count - 1)
+            active &= mean + z * se >= np.max(mean - z * se)
+        if not active.any():
+            break
+    return pl.DataFrame({name: levels, "mean": mean, "se": se,
+                         "min": low, "max": high, "n_reps": count})
+
+
+def sweep_round(env_factory, policy, levels, n_reps, n_workers, max_lanes, seed, kwargs,
+                checkpoint = None):
+    # per-level summaries of n_reps replicates of every level, see policy_sweep
+    import polars as pl
+    per_shard = max(1, max_lanes // n_reps)
+    shards = [levels[i:i + per_shard] for i in range(0, len(levels), per_shard)]
+    args = [(env_factory, policy, shard, n_reps, seed, i * n_reps, kwargs)
+            for i, shard in zip(range(0, len(levels), per_shard), shards)]
+
+    # with a checkpoint directory, each finished shard is saved there and
+    # shards already saved by an interrupted run are read back instead
+    summaries, paths = {}, {}
+    if checkpoint is not None:
+        import os
+        import hashlib
+        os.makedirs(checkpoint, exist_ok=True)
+        spec = repr((policy.__qualname__, levels.tolist(), n_reps, per_shard,
+                     seed.entropy, seed.spawn_key, sorted(kwargs.items())))
+        key = hashlib.sha1(spec.encode()).hexdigest()[:16]
+        for i in range(len(args)):
+            paths[i] = os.path.join(checkpoint, f"{key}_{i}.parquet")
+            if os.path.exists(paths[i]):
+                summaries[i] = pl.read_parquet(paths[i])
+
+    def finish(i, summary):
+        summaries[i] = summary
+        if checkpoint is not None:
+            summary.write_parquet(paths[i] + ".tmp")
+            os.replace(paths[i] + ".tmp", paths[i])
+
+    todo = [i for i in range(len(args)) if i not in summaries]
+    if n_workers and todo:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(n_workers) as pool:
+            futures = {pool.submit(sweep_shard, *args[i]): i for i in todo}
+            for future in as_completed(futures):
+                finish(futures[future], future.result())
     else:
-        return ggplot(dfl, aes("t", "value", color="variable")) + geom_point()
+        for i in todo:
+            finish(i, sweep_shard(*args[i]))
+    return pl.concat([summaries[i] for i in range(len(args))])
 
 
+def sweep_shard(env_factory, policy, levels, n_reps, seed, first, kwargs):
+    import polars as pl
+    from envs.fish_vec import FishVecEnv
+    env = FishVecEnv(env_factory, len(levels) * n_reps)
+    env.seed_lanes(seed, first)
+    agent = policy(np.repeat(levels, n_reps)[:, None], **kwargs)
+    rewards = batch_rewards(agent, env).reshape(len(levels), n_reps)
+    return pl.DataFrame({"level": levels,
+                         "mean": rewards.mean(axis=1),
+                         "se": rewards.std(axis=1, ddof=1) / np.sqrt(n_reps),
+                         "min": rewards.min(axis=1),
+                         "max": rewards.max(axis=1),
+                         "n_reps": np.full(len(levels), n_reps)})
 
-def policy_fn(agent, env, N = 10, geom = "line"):
-    df = []
-    state_space = np.linspace(env.observation_space.low, env.observation_space.high, N)
-    for obs in state_space:
-      action, _ = agent.predict(obs, deterministic=True)
-      df.append([*obs, *action])
-        
-    dfl = pl.DataFrame(df, schema=['obs', 'action'], orient = 'row')
-    if geom == 'line':
-        return ggplot(dfl, aes("obs", "action")) + geom_line()
-    return ggplot(dfl, aes("obs", "action")) + geom_point()
-    
 
+def policy_surface(agent, env, N = 10, fixed = None, chunk = 100_000):
+    """
+    Action of an RL agent at every point of a grid over env's observation
+    space: N points per dimension (an int or one per dimension), except
+    for the dimensions in `fixed` ({index: value}), which are held at value
+    to take a slice. predict is called on chunk points at a time.
+
+    Returns a polars frame with one row per grid point and columns obs,
+    action (obs_i, action_i for multi-dimensional spaces).
+    """
+    import polars as pl
+    fixed = fixed or {}
+    low, high = env.observation_space.low, env.observation_space.high
+    N = np.broadcast_to(N, low.shape)
+    axes = [np.array([fixed[i]], dtype=np.float32) if i in fixed
+            else np.linspace(low[i], high[i], N[i], dtype=np.float32)
+            for i in range(len(low))]
+    shape = [len(a) for a in axes]
+    size = int(np.prod(shape))
+
+    obs = np.empty((size, len(axes)), dtype=np.float32)
+    actions = []
+    for start in range(0, size, chunk):
+        points = obs[start:start + chunk]
+        idx = np.unravel_index(np.arange(start, start + len(points)), shape)
+        for j, (a, i) in enumerate(zip(axes, idx)):
+            points[:, j] = a[i]
+        action, _ = agent.predict(points, deterministic=True)
+        actions.append(np.reshape(action, (len(points), -1)))
+    actions = np.concatenate(actions)
+
+    def names(prefix, n):
+        return [prefix] if n == 1 else [f"{prefix}_{i}" for i in range(n)]
+    columns = dict(zip(names("obs", obs.shape[1]), obs.T))
+    columns.update(zip(names("action", actions.shape[1]), actions.T))
+    return pl.DataFrame(columns)